@@ -47,7 +47,7 @@ def get_credentials():
 
 def main():
     creds = get_credentials()
-    service = build("gmail", "v1", credentials=creds)
+    service = build("gmail", "v1", credentials=creds, static_discovery=True, cache_discovery=False)
 
     # Get profile
     profile = service.users().getProfile(userId="me").execute()
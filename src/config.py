@@ -1,5 +1,7 @@
 """Configuration module using Pydantic settings."""
 
+import re
+from functools import cached_property
 from pathlib import Path
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -16,6 +18,7 @@ class Settings(BaseSettings):
     # Folders
     watch_folder: Path = Path("data/incoming")
     archive_folder: Path = Path("data/archive")
+    watch_folder_polling: bool = True  # Native events don't cross Docker bind mounts
 
     # Gmail OAuth
     gmail_credentials_file: Path = Path("config/credentials.json")
@@ -42,17 +45,35 @@ class Settings(BaseSettings):
 
     # LLM
     gemini_api_key: str
+    # Reuse approval results for near-duplicate emails (needs the optional
+    # sentence-transformers package)
+    llm_semantic_cache: bool = False
+
+    # HTML to PDF: connect to an already running Chromium (e.g.
+    # http://chromium:9222) instead of launching one in this process
+    chromium_cdp_url: str | None = None
 
     # Email monitoring
     gmail_poll_interval: int = 60  # Seconds between email checks
 
+    # Logging level for the app's own loggers (third-party stay at WARNING)
+    log_level: str = "INFO"
+
     # Email matching
     approval_keywords: str = "approved,schvalene,schvalujem,suhlasim,ok,v poriadku"
 
-    @property
-    def approval_keywords_list(self) -> list[str]:
-        """Parse approval keywords into a list."""
-        return [kw.strip().lower() for kw in self.approval_keywords.split(",")]
+    @cached_property
+    def approval_keywords_list(self) -> tuple[str, ...]:
+        """Parse approval keywords once into a tuple."""
+        return tuple(kw.strip().lower() for kw in self.approval_keywords.split(","))
+
+    @cached_property
+    def approval_keywords_pattern(self) -> re.Pattern[str]:
+        """Compile approval keywords into one case-insensitive alternation."""
+        return re.compile(
+            "|".join(re.escape(kw) for kw in self.approval_keywords_list),
+            re.IGNORECASE,
+        )
 
 
 # Global settings instance
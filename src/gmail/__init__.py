@@ -1,16 +1,11 @@
 """Gmail integration module.
 
 Provides authentication, sending, and monitoring for Gmail API.
-"""
 
-from src.gmail.auth import get_gmail_service, get_credentials
-from src.gmail.sender import send_email, reply_to_thread
-from src.gmail.monitor import GmailMonitor
+Submodules are not re-exported here so that callers needing only one of
+them (e.g. ``src.gmail.auth``) don't import the rest; import directly from
+``src.gmail.auth``, ``src.gmail.sender``, ``src.gmail.monitor`` or
+``src.gmail.quota``.
+"""
 
-__all__ = [
-    "get_gmail_service",
-    "get_credentials",
-    "send_email",
-    "reply_to_thread",
-    "GmailMonitor",
-]
+__all__: list[str] = []
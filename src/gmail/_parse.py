@@ -0,0 +1,103 @@
+"""Pure parsing helpers for Gmail API message dicts.
+
+Kept free of GmailMonitor state and I/O: plain functions over dicts and
+strings, so the hot parsing path has no method/attribute lookups and can
+be swapped for a compiled implementation without touching the monitor.
+"""
+
+import binascii
+import re
+
+# Address in angle brackets ("Name <a@b.com>") or a bare address ("a@b.com")
+_ADDR_RE = re.compile(r"<([^>\s]+)>|([^\s,<>\"]+@[^\s,<>\"]+)")
+
+# base64url -> standard base64 alphabet, for the C decoder
+_B64_TRANS = bytes.maketrans(b"-_", b"+/")
+
+
+def b64decode_urlsafe(data: str) -> bytes:
+    """Decode Gmail's base64url data straight through binascii.
+
+    Same result as base64.urlsafe_b64decode without its per-call wrapper
+    overhead and intermediate string copy.
+    """
+    return binascii.a2b_base64(data.encode("ascii").translate(_B64_TRANS))
+
+
+def header_map(headers: list[dict]) -> dict[str, str]:
+    """Build a lowercase header name -> value map.
+
+    Args:
+        headers: List of header dicts with name/value keys.
+
+    Returns:
+        Dict of header values; the first occurrence of a repeated
+        header wins.
+    """
+    return {h.get("name", "").lower(): h.get("value", "") for h in reversed(headers)}
+
+
+def extract_email_addresses(header_value: str) -> list[str]:
+    """Extract email addresses from a header value.
+
+    Handles formats like:
+    - "email@example.com"
+    - "Name <email@example.com>"
+    - "email1@example.com, email2@example.com"
+
+    Args:
+        header_value: Raw header value.
+
+    Returns:
+        List of email addresses.
+    """
+    if not header_value:
+        return []
+
+    # Scanning matches (rather than splitting on ",") also copes with
+    # quoted display names containing commas: "Doe, John" <j@x.com>
+    return [
+        (match.group(1) or match.group(2)).lower()
+        for match in _ADDR_RE.finditer(header_value)
+    ]
+
+
+def walk_payload(payload: dict) -> tuple[str, str, list[tuple[str, str]]]:
+    """Walk the MIME tree once, collecting bodies and attachment references.
+
+    Iterative depth-first walk in document order, so the first
+    text/plain and text/html parts win.
+
+    Args:
+        payload: Message payload dict.
+
+    Returns:
+        Tuple of (body_text, body_html, [(filename, attachment_id), ...]).
+    """
+    body_text = ""
+    body_html = ""
+    attachments: list[tuple[str, str]] = []
+
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        get = part.get
+        body = get("body") or {}
+
+        filename = get("filename")
+        attachment_id = body.get("attachmentId")
+        if filename and attachment_id:
+            attachments.append((filename, attachment_id))
+        elif "data" in body:
+            mime_type = get("mimeType", "")
+            if mime_type == "text/plain" and not body_text:
+                body_text = b64decode_urlsafe(body["data"]).decode("utf-8", errors="replace")
+            elif mime_type == "text/html" and not body_html:
+                body_html = b64decode_urlsafe(body["data"]).decode("utf-8", errors="replace")
+
+        parts = get("parts")
+        if parts:
+            # Reversed so parts pop off the stack in document order
+            stack.extend(reversed(parts))
+
+    return body_text, body_html, attachments
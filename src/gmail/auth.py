@@ -4,13 +4,17 @@ Handles OAuth 2.0 flow, token storage, and automatic refresh.
 """
 
 import logging
+import threading
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build, Resource
+from googleapiclient.http import build_http
 
 from src.config import settings
 
@@ -26,6 +30,16 @@ SCOPES = [
 # Minimum remaining token lifetime before proactive refresh (5 minutes)
 MIN_TOKEN_LIFETIME_SECONDS = 300
 
+# Last full freshness check: (id(creds), expiry) and the monotonic deadline
+# until which the token is known to stay above MIN_TOKEN_LIFETIME_SECONDS
+_fresh_until: tuple[tuple[int, datetime], float] | None = None
+
+# Gmail service per thread (httplib2 is not thread-safe), rebuilt only
+# when its credentials need refresh
+_thread_local = threading.local()
+# Bumped by reset_gmail_service() to invalidate every thread's service
+_service_generation = 0
+
 
 def _load_credentials(token_path: Path) -> Credentials | None:
     """Load credentials from token file if it exists."""
@@ -53,6 +67,16 @@ def _save_credentials(creds: Credentials, token_path: Path) -> None:
 
 def _needs_refresh(creds: Credentials) -> bool:
     """Check if credentials need refresh (expired or < 5 min remaining)."""
+    global _fresh_until
+
+    # Fast path: same token already checked and its deadline not reached
+    if (
+        _fresh_until is not None
+        and _fresh_until[0] == (id(creds), creds.expiry)
+        and time.monotonic() < _fresh_until[1]
+    ):
+        return False
+
     if not creds.valid:
         return True
 
@@ -62,13 +86,17 @@ def _needs_refresh(creds: Credentials) -> bool:
 
     # Check if less than 5 minutes remaining
     now = datetime.now(timezone.utc)
-    expiry = creds.expiry.replace(tzinfo=timezone.utc) if creds.expiry.tzinfo is None else creds.expiry
+    expiry = creds.expiry if creds.expiry.tzinfo else creds.expiry.replace(tzinfo=timezone.utc)
     remaining = (expiry - now).total_seconds()
 
     if remaining < MIN_TOKEN_LIFETIME_SECONDS:
         logger.debug("Token expires in %d seconds, needs refresh", remaining)
         return True
 
+    _fresh_until = (
+        (id(creds), creds.expiry),
+        time.monotonic() + remaining - MIN_TOKEN_LIFETIME_SECONDS,
+    )
     return False
 
 
@@ -94,9 +122,8 @@ def _run_oauth_flow(credentials_path: Path) -> Credentials:
             "Download from Google Cloud Console."
         )
 
+    import socket
     import sys
-    from wsgiref.simple_server import make_server
-    import threading
 
     port = settings.oauth_callback_port
     host = settings.oauth_callback_host
@@ -119,22 +146,24 @@ def _run_oauth_flow(credentials_path: Path) -> Credentials:
     sys.stdout.flush()
     sys.stderr.flush()
 
-    # Simple WSGI app to capture the callback
-    authorization_response = [None]
-
-    def wsgi_app(environ, start_response):
-        from urllib.parse import urlunsplit
-        query = environ.get("QUERY_STRING", "")
-        authorization_response[0] = f"http://{host}:{port}/?{query}"
-        start_response("200 OK", [("Content-Type", "text/html")])
-        return [b"<html><body><h1>Authorization successful!</h1><p>You can close this window.</p></body></html>"]
-
-    # Start server
-    server = make_server("0.0.0.0", port, wsgi_app)
-    server.handle_request()  # Handle single request
+    # Accept the single redirect on a bare socket; only the query string
+    # of the request line ("GET /?code=... HTTP/1.1") is needed
+    with socket.create_server(("0.0.0.0", port)) as server:
+        conn, _ = server.accept()
+        with conn:
+            request_line = conn.recv(4096).decode("latin-1").split("\r\n", 1)[0]
+            path = request_line.split(" ")[1] if request_line.count(" ") >= 2 else "/"
+            query = path.partition("?")[2]
+            conn.sendall(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/html\r\n"
+                b"Connection: close\r\n\r\n"
+                b"<html><body><h1>Authorization successful!</h1><p>You can close this window.</p></body></html>"
+            )
+    authorization_response = f"http://{host}:{port}/?{query}"
 
     # Exchange code for token
-    flow.fetch_token(authorization_response=authorization_response[0])
+    flow.fetch_token(authorization_response=authorization_response)
     logger.warning("OAuth flow completed successfully!")
     return flow.credentials
 
@@ -179,6 +208,10 @@ def get_credentials() -> Credentials:
 def get_gmail_service() -> Resource:
     """Get authenticated Gmail API service.
 
+    The service is cached per thread (the underlying httplib2 transport
+    is not thread-safe) and rebuilt only when its credentials are expired
+    or about to expire.
+
     Returns:
         Authenticated Gmail API service resource.
 
@@ -186,7 +219,36 @@ def get_gmail_service() -> Resource:
         FileNotFoundError: If credentials.json not found.
         ValueError: If token refresh fails.
     """
+    service = getattr(_thread_local, "service", None)
+    if (
+        service is not None
+        and _thread_local.generation == _service_generation
+        and not _needs_refresh(_thread_local.credentials)
+    ):
+        return service
+
     creds = get_credentials()
-    service = build("gmail", "v1", credentials=creds)
+    # One authorized transport per service: httplib2 keeps its TCP/TLS
+    # connection alive, so polls and sends reuse it instead of handshaking
+    http = AuthorizedHttp(creds, http=build_http())
+    # Use the discovery document bundled with google-api-python-client
+    # instead of fetching it over the network on every build
+    service = build(
+        "gmail",
+        "v1",
+        http=http,
+        static_discovery=True,
+        cache_discovery=False,
+    )
+    _thread_local.service = service
+    _thread_local.credentials = creds
+    _thread_local.generation = _service_generation
     logger.debug("Gmail service created")
     return service
+
+
+def reset_gmail_service() -> None:
+    """Drop the cached Gmail services so the next call in each thread rebuilds."""
+    global _service_generation
+
+    _service_generation += 1
@@ -4,16 +4,26 @@ Polls Gmail inbox for new emails matching specified criteria.
 """
 
 import asyncio
-import base64
+import functools
+import hashlib
 import logging
+import os
+import tempfile
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from googleapiclient.discovery import Resource
 from googleapiclient.errors import HttpError
 
-from src.gmail.auth import get_gmail_service
+from src.gmail import quota
+from src.gmail._parse import (
+    b64decode_urlsafe,
+    extract_email_addresses,
+    header_map,
+    walk_payload,
+)
+from src.gmail.auth import get_gmail_service, reset_gmail_service
 from src.config import settings
 from src.models import EmailInfo
 
@@ -25,6 +35,45 @@ INITIAL_BACKOFF_SECONDS = 1
 MAX_BACKOFF_SECONDS = 60
 NETWORK_FAILURE_THRESHOLD = 3
 
+# Worker threads for blocking Gmail calls (each keeps its own service)
+GMAIL_WORKERS = 8
+
+# Push notifications: Gmail expires a watch after 7 days, renew after 6;
+# the wait for a notification wakes up periodically to check both
+WATCH_RENEW_SECONDS = 6 * 24 * 60 * 60
+WATCH_WAKEUP_SECONDS = 60
+
+# Gmail API limit on calls per batch HTTP request
+BATCH_MAX_REQUESTS = 100
+
+# Headers requested when only message metadata is fetched
+METADATA_HEADERS = ["From", "To", "Cc", "Subject"]
+
+# Partial-response field masks: only what _parse_message and the list/
+# history readers consume, so Gmail skips snippet, labels, sizes etc.
+MESSAGE_FIELDS = "id,threadId,payload"
+MESSAGE_METADATA_FIELDS = "id,threadId,payload/headers"
+LIST_FIELDS = "messages/id"
+HISTORY_FIELDS = "history/messagesAdded/message(id,threadId),historyId,nextPageToken"
+
+# Attachment data is decoded and written in slices of this many base64
+# characters (a multiple of 4, so every slice decodes on its own)
+ATTACHMENT_DECODE_CHUNK = 1024 * 1024
+
+
+@functools.lru_cache(maxsize=64)
+def _build_query(from_email: str | None, thread_id: str | None, unread_only: bool) -> str:
+    """Build (once per combination) the Gmail search query for a poll."""
+    query_parts = []
+    if from_email:
+        query_parts.append(f"from:{from_email}")
+    if unread_only:
+        query_parts.append("is:unread")
+    if thread_id:
+        query_parts.append(f"thread:{thread_id}")
+
+    return " ".join(query_parts) if query_parts else "is:unread"
+
 
 class GmailMonitor:
     """Monitors Gmail inbox for new emails.
@@ -42,32 +91,60 @@ class GmailMonitor:
         poll_interval: int | None = None,
         service: Resource | None = None,
         temp_dir: Path | None = None,
+        watch_senders: list[str] | None = None,
     ):
         """Initialize the Gmail monitor.
 
         Args:
             poll_interval: Seconds between inbox polls (default from settings).
-            service: Gmail API service (created if not provided).
+            service: Gmail API service (created if not provided). An injected
+                service is not assumed to be thread-safe, so calls then run
+                on a single worker thread.
             temp_dir: Directory for downloaded attachments (default data/temp).
+            watch_senders: If given, only messages from these senders are
+                parsed and have attachments downloaded; others are skipped.
         """
         self.poll_interval = poll_interval or settings.gmail_poll_interval
+        # Injected service is used as-is; otherwise each worker thread gets
+        # its own from get_gmail_service()
         self._service = service
         self._temp_dir = temp_dir or Path("data/temp")
+        self._watch_set = (
+            frozenset(sender.lower() for sender in watch_senders) if watch_senders else None
+        )
         self._last_history_id: str | None = None
+        # Per-query history cursors for incremental unread polls
+        self._history_cursors: dict[str, str] = {}
         self._consecutive_failures = 0
         self._running = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=1 if service is not None else GMAIL_WORKERS,
+            thread_name_prefix="gmail",
+        )
 
     @property
     def service(self) -> Resource:
-        """Get or create Gmail API service."""
-        if self._service is None:
-            self._service = get_gmail_service()
-        return self._service
+        """Get the injected Gmail API service or the calling thread's one."""
+        if self._service is not None:
+            return self._service
+        return get_gmail_service()
 
     def _refresh_service(self) -> None:
         """Refresh the Gmail API service (e.g., after auth error)."""
         logger.info("Refreshing Gmail API service")
-        self._service = get_gmail_service()
+        reset_gmail_service()
+        self._service = None
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking Gmail call on the monitor's worker pool.
+
+        A dedicated, bounded pool (rather than the loop's default
+        executor) keeps the number of per-thread Gmail services fixed.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
 
     async def _exponential_backoff(self, attempt: int) -> None:
         """Wait with exponential backoff.
@@ -89,30 +166,86 @@ class GmailMonitor:
         Returns:
             List of message metadata dicts.
         """
+        quota.acquire("messages.list")
         response = (
             self.service.users()
             .messages()
-            .list(userId="me", q=query, maxResults=max_results)
+            .list(userId="me", q=query, maxResults=max_results, fields=LIST_FIELDS)
             .execute()
         )
         return response.get("messages", [])
 
-    def _get_message_detail(self, message_id: str) -> dict:
-        """Get full message details.
+    def _message_get_request(self, message_id: str, need_body: bool = True):
+        """Build a messages.get request, full or headers-only.
 
         Args:
             message_id: Gmail message ID.
+            need_body: Fetch the full message; otherwise only METADATA_HEADERS.
 
         Returns:
-            Full message dict from API.
+            Unexecuted HttpRequest.
         """
-        return (
-            self.service.users()
-            .messages()
-            .get(userId="me", id=message_id, format="full")
-            .execute()
+        messages = self.service.users().messages()
+        if need_body:
+            return messages.get(
+                userId="me", id=message_id, format="full", fields=MESSAGE_FIELDS
+            )
+        return messages.get(
+            userId="me",
+            id=message_id,
+            format="metadata",
+            metadataHeaders=METADATA_HEADERS,
+            fields=MESSAGE_METADATA_FIELDS,
         )
 
+    def _get_message_detail(self, message_id: str, need_body: bool = True) -> dict:
+        """Get message details.
+
+        Args:
+            message_id: Gmail message ID.
+            need_body: Fetch the full message; otherwise only METADATA_HEADERS.
+
+        Returns:
+            Message dict from API.
+        """
+        quota.acquire("messages.get")
+        return self._message_get_request(message_id, need_body).execute()
+
+    def _get_message_details(
+        self, message_ids: list[str], need_body: bool = True
+    ) -> dict[str, dict]:
+        """Get details for several messages in batch requests.
+
+        Args:
+            message_ids: Gmail message IDs.
+            need_body: Fetch full messages; otherwise only METADATA_HEADERS.
+
+        Returns:
+            Dict mapping message ID to full message dict. Messages that
+            failed to fetch are logged and left out.
+        """
+        details: dict[str, dict] = {}
+
+        def on_message(request_id: str, response: dict, exception: Exception | None) -> None:
+            if exception is not None:
+                logger.error("Error fetching message %s: %s", request_id, exception)
+            else:
+                details[request_id] = response
+
+        for start in range(0, len(message_ids), BATCH_MAX_REQUESTS):
+            chunk = message_ids[start : start + BATCH_MAX_REQUESTS]
+            batch = self.service.new_batch_http_request(callback=on_message)
+            for message_id in chunk:
+                batch.add(
+                    self._message_get_request(message_id, need_body),
+                    request_id=message_id,
+                )
+            # Each call in a batch counts against the quota separately
+            quota.acquire("messages.get", len(chunk))
+            batch.execute()
+
+        return details
+
     def _extract_header(self, headers: list[dict], name: str) -> str:
         """Extract a header value from message headers.
 
@@ -123,38 +256,30 @@ class GmailMonitor:
         Returns:
             Header value or empty string if not found.
         """
-        for header in headers:
-            if header.get("name", "").lower() == name.lower():
-                return header.get("value", "")
-        return ""
+        return self._header_map(headers).get(name.lower(), "")
+
+    def _header_map(self, headers: list[dict]) -> dict[str, str]:
+        """Build a lowercase header name -> value map (see _parse.header_map)."""
+        return header_map(headers)
 
     def _extract_email_addresses(self, header_value: str) -> list[str]:
         """Extract email addresses from a header value.
 
-        Handles formats like:
-        - "email@example.com"
-        - "Name <email@example.com>"
-        - "email1@example.com, email2@example.com"
-
         Args:
             header_value: Raw header value.
 
         Returns:
-            List of email addresses.
+            List of email addresses (see _parse.extract_email_addresses).
         """
-        if not header_value:
-            return []
+        return extract_email_addresses(header_value)
+
+    def _walk_payload(self, payload: dict) -> tuple[str, str, list[tuple[str, str]]]:
+        """Walk the MIME tree once (see _parse.walk_payload).
 
-        addresses = []
-        for part in header_value.split(","):
-            part = part.strip()
-            if "<" in part and ">" in part:
-                # "Name <email@example.com>" format
-                email = part[part.index("<") + 1 : part.index(">")]
-                addresses.append(email.lower())
-            elif "@" in part:
-                addresses.append(part.lower())
-        return addresses
+        Returns:
+            Tuple of (body_text, body_html, [(filename, attachment_id), ...]).
+        """
+        return walk_payload(payload)
 
     def _extract_body(self, payload: dict) -> tuple[str, str]:
         """Extract plain text and HTML body from message payload.
@@ -165,27 +290,7 @@ class GmailMonitor:
         Returns:
             Tuple of (body_text, body_html).
         """
-        body_text = ""
-        body_html = ""
-
-        def process_part(part: dict) -> None:
-            nonlocal body_text, body_html
-
-            mime_type = part.get("mimeType", "")
-            body = part.get("body", {})
-
-            if "data" in body:
-                decoded = base64.urlsafe_b64decode(body["data"]).decode("utf-8", errors="replace")
-                if mime_type == "text/plain" and not body_text:
-                    body_text = decoded
-                elif mime_type == "text/html" and not body_html:
-                    body_html = decoded
-
-            # Process nested parts
-            for subpart in part.get("parts", []):
-                process_part(subpart)
-
-        process_part(payload)
+        body_text, body_html, _ = self._walk_payload(payload)
         return body_text, body_html
 
     def _download_attachment(
@@ -205,6 +310,7 @@ class GmailMonitor:
         self._temp_dir.mkdir(parents=True, exist_ok=True)
 
         # Get attachment data
+        quota.acquire("attachments.get")
         attachment = (
             self.service.users()
             .messages()
@@ -213,19 +319,42 @@ class GmailMonitor:
             .execute()
         )
 
-        data = base64.urlsafe_b64decode(attachment["data"])
+        data = attachment.pop("data")
 
-        # Generate unique filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Decode slice by slice into a temp file, hashing as we go, so the
+        # decoded PDF is never held in memory next to its base64 text and
+        # a crash mid-write never leaves a truncated file under the final name
+        digest = hashlib.blake2b(digest_size=8)
+        fd, tmp_name = tempfile.mkstemp(dir=self._temp_dir, prefix=".download_", suffix=".tmp")
+        tmp_path = Path(tmp_name)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for start in range(0, len(data), ATTACHMENT_DECODE_CHUNK):
+                    chunk = b64decode_urlsafe(data[start : start + ATTACHMENT_DECODE_CHUNK])
+                    digest.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        # Name by content hash: no same-second collisions, and a PDF that
+        # was already downloaded is not written again
         # Keep original extension if present
         if "." in filename:
             base_name, ext = filename.rsplit(".", 1)
-            new_filename = f"invoice_{timestamp}.{ext}"
+            new_filename = f"invoice_{digest.hexdigest()}.{ext}"
         else:
-            new_filename = f"invoice_{timestamp}"
+            new_filename = f"invoice_{digest.hexdigest()}"
 
         filepath = self._temp_dir / new_filename
-        filepath.write_bytes(data)
+        if filepath.exists():
+            tmp_path.unlink()
+            # Bump mtime so it still counts as the latest download
+            os.utime(filepath)
+            logger.info("Attachment already downloaded as %s", filepath)
+            return filepath
+
+        os.replace(tmp_path, filepath)
         logger.info("Downloaded attachment to %s", filepath)
         return filepath
 
@@ -242,37 +371,42 @@ class GmailMonitor:
             List of (filename, downloaded_path) tuples.
             downloaded_path is None for non-PDF attachments.
         """
-        attachments = []
-
-        def process_part(part: dict) -> None:
-            filename = part.get("filename", "")
-            body = part.get("body", {})
-            attachment_id = body.get("attachmentId")
+        _, _, attachments = self._walk_payload(payload)
+        return self._download_attachments(message_id, attachments)
 
-            if filename and attachment_id:
-                downloaded_path = None
-                # Download PDF attachments
-                if filename.lower().endswith(".pdf"):
-                    try:
-                        downloaded_path = self._download_attachment(
-                            message_id, attachment_id, filename
-                        )
-                    except Exception as e:
-                        logger.error("Failed to download attachment %s: %s", filename, e)
-                attachments.append((filename, downloaded_path))
+    def _download_attachments(
+        self, message_id: str, attachments: list[tuple[str, str]]
+    ) -> list[tuple[str, Path | None]]:
+        """Download the PDF attachments among the given references.
 
-            # Process nested parts
-            for subpart in part.get("parts", []):
-                process_part(subpart)
+        Args:
+            message_id: Gmail message ID.
+            attachments: (filename, attachment_id) tuples from _walk_payload.
 
-        process_part(payload)
-        return attachments
+        Returns:
+            List of (filename, downloaded_path) tuples.
+            downloaded_path is None for non-PDF attachments.
+        """
+        results = []
+        for filename, attachment_id in attachments:
+            downloaded_path = None
+            # Download PDF attachments
+            if filename.lower().endswith(".pdf"):
+                try:
+                    downloaded_path = self._download_attachment(
+                        message_id, attachment_id, filename
+                    )
+                except Exception as e:
+                    logger.error("Failed to download attachment %s: %s", filename, e)
+            results.append((filename, downloaded_path))
+        return results
 
     def _parse_message(self, message: dict, download_attachments: bool = True) -> EmailInfo:
         """Parse a Gmail message into EmailInfo.
 
         Args:
-            message: Full message dict from API.
+            message: Message dict from API. A metadata-format message has
+                no MIME parts, so bodies and attachments come back empty.
             download_attachments: Whether to download PDF attachments.
 
         Returns:
@@ -282,31 +416,17 @@ class GmailMonitor:
         headers = payload.get("headers", [])
 
         # Extract headers
-        from_email = self._extract_email_addresses(self._extract_header(headers, "From"))
-        to_emails = self._extract_email_addresses(self._extract_header(headers, "To"))
-        cc_emails = self._extract_email_addresses(self._extract_header(headers, "Cc"))
-        subject = self._extract_header(headers, "Subject")
-
-        # Extract body
-        body_text, body_html = self._extract_body(payload)
-
-        # Extract attachments
-        attachment_names = []
+        headers_by_name = header_map(headers)
+        from_email = extract_email_addresses(headers_by_name.get("from", ""))
+        to_emails = extract_email_addresses(headers_by_name.get("to", ""))
+        cc_emails = extract_email_addresses(headers_by_name.get("cc", ""))
+        subject = headers_by_name.get("subject", "")
+
+        # Extract body and attachments in a single pass over the MIME tree
+        body_text, body_html, attachments = walk_payload(payload)
         if download_attachments:
-            attachments = self._extract_attachments(message["id"], payload)
-            attachment_names = [name for name, _ in attachments]
-        else:
-            # Just get names without downloading
-            def get_attachment_names(part: dict) -> list[str]:
-                names = []
-                filename = part.get("filename", "")
-                if filename and part.get("body", {}).get("attachmentId"):
-                    names.append(filename)
-                for subpart in part.get("parts", []):
-                    names.extend(get_attachment_names(subpart))
-                return names
-
-            attachment_names = get_attachment_names(payload)
+            self._download_attachments(message["id"], attachments)
+        attachment_names = tuple(name for name, _ in attachments)
 
         return EmailInfo(
             message_id=message["id"],
@@ -327,6 +447,7 @@ class GmailMonitor:
         unread_only: bool = True,
         mark_as_read: bool = True,
         max_results: int = 10,
+        need_body: bool = True,
     ) -> list[EmailInfo]:
         """Check for new emails matching criteria.
 
@@ -336,6 +457,9 @@ class GmailMonitor:
             unread_only: Only return unread messages.
             mark_as_read: Mark returned messages as read.
             max_results: Maximum number of messages to return.
+            need_body: Fetch full messages (bodies, attachment names, PDF
+                downloads). If False only sender/recipients/subject are
+                fetched, which is much smaller over the wire.
 
         Returns:
             List of EmailInfo for matching messages.
@@ -343,28 +467,54 @@ class GmailMonitor:
         Raises:
             HttpError: On API errors after retries exhausted.
         """
-        # Build query
-        query_parts = []
-        if from_email:
-            query_parts.append(f"from:{from_email}")
-        if unread_only:
-            query_parts.append("is:unread")
-        if thread_id:
-            query_parts.append(f"thread:{thread_id}")
+        query = _build_query(from_email, thread_id, unread_only)
+
+        # Unread polls keep a history cursor: after the first full search,
+        # only messages added since the previous poll are looked at
+        # (only when results are marked read, so they are not expected again)
+        use_history = unread_only and mark_as_read and not thread_id
+        cursor = self._history_cursors.get(query) if use_history else None
+        if cursor is not None:
+            try:
+                message_ids, new_cursor = await self._run_blocking(
+                    self._poll_history, cursor, from_email
+                )
+            except Exception as e:
+                # 404 means the cursor expired (> ~7 days); re-seed below
+                logger.info("History poll failed, falling back to search: %s", e)
+                del self._history_cursors[query]
+            else:
+                self._consecutive_failures = 0
+                if not message_ids:
+                    logger.debug("No new messages since history %s", cursor)
+                    self._history_cursors[query] = new_cursor
+                    return []
+                results = await self._fetch_and_parse(message_ids, mark_as_read, need_body)
+                self._history_cursors[query] = new_cursor
+                logger.info("Found %d matching emails", len(results))
+                return results
 
-        query = " ".join(query_parts) if query_parts else "is:unread"
         logger.debug("Checking for emails with query: %s", query)
 
-        # Execute with retry
+        # Execute with retry; Gmail calls run in a worker thread so several
+        # polls can overlap
         for attempt in range(MAX_RETRIES):
             try:
-                messages = self._get_messages_by_query(query, max_results)
+                # Seed the cursor before searching so nothing falls in between
+                if use_history:
+                    seed = await self._run_blocking(self._current_history_id)
+                messages = await self._run_blocking(
+                    self._get_messages_by_query, query, max_results
+                )
+                if use_history:
+                    self._history_cursors[query] = seed
                 self._consecutive_failures = 0
                 break
             except HttpError as e:
                 if e.resp.status == 429:
                     # Rate limited
                     logger.warning("Rate limited, backing off")
+                    quota.gmail_quota.penalize()
                     await self._exponential_backoff(attempt)
                 elif e.resp.status in (401, 403):
                     # Auth error
@@ -395,22 +545,73 @@ class GmailMonitor:
             logger.debug("No matching messages found")
             return []
 
-        # Parse messages
-        results = []
-        for msg_meta in messages:
-            try:
-                message = self._get_message_detail(msg_meta["id"])
-                email_info = self._parse_message(message)
-                results.append(email_info)
+        results = await self._fetch_and_parse(
+            [msg_meta["id"] for msg_meta in messages], mark_as_read, need_body
+        )
+        logger.info("Found %d matching emails", len(results))
+        return results
 
-                # Mark as read if requested
-                if mark_as_read:
-                    self._mark_as_read(msg_meta["id"])
+    def _is_watched(self, message: dict) -> bool:
+        """Whether a message's sender is in the watch set (always True if unset)."""
+        if self._watch_set is None:
+            return True
+        headers = self._header_map(message.get("payload", {}).get("headers", []))
+        senders = self._extract_email_addresses(headers.get("from", ""))
+        return bool(senders) and senders[0] in self._watch_set
 
-            except Exception as e:
-                logger.error("Error parsing message %s: %s", msg_meta["id"], e)
+    async def _fetch_and_parse(
+        self, message_ids: list[str], mark_as_read: bool, need_body: bool = True
+    ) -> list[EmailInfo]:
+        """Fetch, parse and optionally mark read the given messages.
+
+        Blocking Gmail calls and attachment writes run in worker threads,
+        one per message for parsing, so downloads for several emails
+        overlap and the event loop stays free.
+
+        Args:
+            message_ids: Gmail message IDs.
+            mark_as_read: Mark parsed messages as read.
+            need_body: Fetch full messages; otherwise headers only.
+
+        Returns:
+            List of EmailInfo for messages that were fetched and parsed.
+        """
+        # Fetch all messages in one batch round trip instead of one call each
+        try:
+            details = await self._run_blocking(self._get_message_details, message_ids, need_body)
+        except Exception as e:
+            # Messages stay unread and are picked up by the next poll
+            logger.error("Error fetching messages: %s", e)
+            return []
+
+        # Parse messages (downloading PDF attachments) concurrently, skipping
+        # senders outside the watch set before any download
+        fetched_ids = [
+            message_id
+            for message_id in message_ids
+            if message_id in details and self._is_watched(details[message_id])
+        ]
+        parsed = await asyncio.gather(
+            *(
+                self._run_blocking(self._parse_message, details[message_id], need_body)
+                for message_id in fetched_ids
+            ),
+            return_exceptions=True,
+        )
+
+        results = []
+        parsed_ids = []
+        for message_id, email_info in zip(fetched_ids, parsed):
+            if isinstance(email_info, Exception):
+                logger.error("Error parsing message %s: %s", message_id, email_info)
+                continue
+            results.append(email_info)
+            parsed_ids.append(message_id)
+
+        # Mark as read if requested
+        if mark_as_read and parsed_ids:
+            await self._run_blocking(self._mark_many_as_read, parsed_ids)
 
-        logger.info("Found %d matching emails", len(results))
         return results
 
     def _mark_as_read(self, message_id: str) -> None:
@@ -420,6 +621,7 @@ class GmailMonitor:
             message_id: Gmail message ID.
         """
         try:
+            quota.acquire("messages.modify")
             self.service.users().messages().modify(
                 userId="me",
                 id=message_id,
@@ -429,6 +631,38 @@ class GmailMonitor:
         except Exception as e:
             logger.warning("Failed to mark message %s as read: %s", message_id, e)
 
+    def _mark_many_as_read(self, message_ids: list[str]) -> None:
+        """Mark several messages as read using batch requests.
+
+        Args:
+            message_ids: Gmail message IDs.
+        """
+
+        def on_modified(request_id: str, response: dict, exception: Exception | None) -> None:
+            if exception is not None:
+                logger.warning("Failed to mark message %s as read: %s", request_id, exception)
+            else:
+                logger.debug("Marked message %s as read", request_id)
+
+        messages = self.service.users().messages()
+        for start in range(0, len(message_ids), BATCH_MAX_REQUESTS):
+            chunk = message_ids[start : start + BATCH_MAX_REQUESTS]
+            batch = self.service.new_batch_http_request(callback=on_modified)
+            for message_id in chunk:
+                batch.add(
+                    messages.modify(
+                        userId="me",
+                        id=message_id,
+                        body={"removeLabelIds": ["UNREAD"]},
+                    ),
+                    request_id=message_id,
+                )
+            quota.acquire("messages.modify", len(chunk))
+            try:
+                batch.execute()
+            except Exception as e:
+                logger.warning("Failed to mark messages as read: %s", e)
+
     async def poll_once(
         self,
         from_email: str | None = None,
@@ -467,10 +701,17 @@ class GmailMonitor:
 
         while self._running:
             try:
-                # Check for emails from each sender
+                # Check for emails from all senders concurrently
                 if from_emails:
-                    for from_email in from_emails:
-                        emails = await self.poll_once(from_email=from_email)
+                    results = await asyncio.gather(
+                        *(self.poll_once(from_email=fe) for fe in from_emails),
+                        return_exceptions=True,
+                    )
+                    for from_email, emails in zip(from_emails, results):
+                        if isinstance(emails, Exception):
+                            logger.error("Error polling %s: %s", from_email, emails)
+                            continue
+                        # Callbacks stay sequential, they drive workflow state
                         if callback:
                             for email_info in emails:
                                 await callback(email_info)
@@ -486,11 +727,251 @@ class GmailMonitor:
             # Wait for next poll
             await asyncio.sleep(self.poll_interval)
 
+    def _watch(self, topic_name: str) -> None:
+        """Register (or renew) Gmail push notifications to a Pub/Sub topic.
+
+        Args:
+            topic_name: Full Pub/Sub topic name (projects/<id>/topics/<name>).
+        """
+        quota.acquire("watch")
+        response = (
+            self.service.users()
+            .watch(userId="me", body={"topicName": topic_name, "labelIds": ["INBOX"]})
+            .execute()
+        )
+        if self._last_history_id is None:
+            self._last_history_id = response["historyId"]
+        logger.info("Gmail watch registered, history ID %s", self._last_history_id)
+
+    def _new_message_ids_from_history(self, from_emails: frozenset[str] | None) -> list[str]:
+        """List inbox messages added since the last seen history ID.
+
+        The sender check uses a metadata-only fetch.
+
+        Args:
+            from_emails: Lowercase sender addresses to accept (None for all).
+
+        Returns:
+            IDs of new messages from the given senders.
+        """
+        message_ids, self._last_history_id = self._list_added_message_ids(
+            self._last_history_id, "INBOX"
+        )
+        if from_emails:
+            message_ids = self._filter_by_sender(message_ids, from_emails)
+        return message_ids
+
+    def _list_added_message_ids(
+        self, start_history_id: str, label_id: str
+    ) -> tuple[list[str], str]:
+        """List messages added to a label since a history ID.
+
+        Args:
+            start_history_id: History ID to read changes from.
+            label_id: Only include messages with this label.
+
+        Returns:
+            Tuple of (unique message IDs in order, latest history ID).
+
+        Raises:
+            HttpError: 404 if start_history_id is too old.
+        """
+        messages, history_id = self._list_added_messages(start_history_id, label_id)
+        return [message["id"] for message in messages], history_id
+
+    def _list_added_messages(
+        self, start_history_id: str, label_id: str
+    ) -> tuple[list[dict], str]:
+        """List messages added to a label since a history ID, with thread IDs.
+
+        Args:
+            start_history_id: History ID to read changes from.
+            label_id: Only include messages with this label.
+
+        Returns:
+            Tuple of (unique {"id", "threadId"} stubs in order, latest history ID).
+
+        Raises:
+            HttpError: 404 if start_history_id is too old.
+        """
+        messages: dict[str, dict] = {}
+        page_token = None
+        while True:
+            quota.acquire("history.list")
+            response = (
+                self.service.users()
+                .history()
+                .list(
+                    userId="me",
+                    startHistoryId=start_history_id,
+                    historyTypes=["messageAdded"],
+                    labelId=label_id,
+                    pageToken=page_token,
+                    fields=HISTORY_FIELDS,
+                )
+                .execute()
+            )
+            for record in response.get("history", []):
+                for added in record.get("messagesAdded", []):
+                    messages.setdefault(added["message"]["id"], added["message"])
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+        return list(messages.values()), response.get("historyId", start_history_id)
+
+    def _filter_by_sender(self, message_ids: list[str], from_emails: frozenset[str]) -> list[str]:
+        """Keep messages whose sender is one of from_emails (metadata-only fetch).
+
+        Args:
+            message_ids: Gmail message IDs.
+            from_emails: Lowercase sender addresses to accept.
+
+        Returns:
+            Matching message IDs, in the original order.
+        """
+        if not message_ids:
+            return []
+        headers = self._get_message_details(message_ids, need_body=False)
+        return [
+            message_id
+            for message_id in message_ids
+            if message_id in headers
+            and self._parse_message(headers[message_id], download_attachments=False).from_email
+            in from_emails
+        ]
+
+    def _poll_history(
+        self, cursor: str, from_email: str | None
+    ) -> tuple[list[str], str]:
+        """Unread messages added since a history cursor, optionally by sender.
+
+        Args:
+            cursor: History ID of the previous poll.
+            from_email: Filter by sender email address.
+
+        Returns:
+            Tuple of (matching message IDs, new cursor).
+        """
+        message_ids, cursor = self._list_added_message_ids(cursor, "UNREAD")
+        if from_email:
+            message_ids = self._filter_by_sender(message_ids, frozenset([from_email.lower()]))
+        return message_ids, cursor
+
+    def _current_history_id(self) -> str:
+        """Get the mailbox's current history ID."""
+        quota.acquire("getProfile")
+        return self.service.users().getProfile(userId="me").execute()["historyId"]
+
+    async def start_watching(
+        self,
+        topic_name: str,
+        subscription_name: str,
+        from_emails: list[str] | None = None,
+        callback=None,
+    ) -> None:
+        """Process new emails as Gmail push notifications arrive.
+
+        Event-driven alternative to start_polling: the inbox is only read
+        when Gmail publishes a change to the Pub/Sub topic. Requires the
+        optional google-cloud-pubsub package; start_polling remains the
+        fallback when push notifications are not set up.
+
+        Args:
+            topic_name: Full Pub/Sub topic name Gmail publishes to.
+            subscription_name: Full Pub/Sub subscription name to pull from.
+            from_emails: List of sender emails to watch for.
+            callback: Async function called with each EmailInfo.
+                     If None, emails are logged but not processed.
+
+        Raises:
+            ImportError: If google-cloud-pubsub is not installed.
+        """
+        try:
+            from google.cloud import pubsub_v1
+        except ImportError as e:
+            raise ImportError(
+                "google-cloud-pubsub is required for Gmail push notifications"
+            ) from e
+
+        self._running = True
+        senders = (
+            frozenset(email.lower() for email in from_emails) if from_emails else self._watch_set
+        )
+        loop = asyncio.get_running_loop()
+        notifications: asyncio.Queue[None] = asyncio.Queue()
+
+        def on_notification(message) -> None:
+            # Runs on the subscriber's thread; the payload only carries the
+            # new history ID, history.list does the actual work
+            message.ack()
+            loop.call_soon_threadsafe(notifications.put_nowait, None)
+
+        subscriber = pubsub_v1.SubscriberClient()
+        streaming_pull = subscriber.subscribe(subscription_name, callback=on_notification)
+        logger.info("Starting Gmail monitor, watching %s", topic_name)
+
+        watched_at: float | None = None
+        try:
+            while self._running:
+                try:
+                    if watched_at is None or time.monotonic() - watched_at > WATCH_RENEW_SECONDS:
+                        await self._run_blocking(self._watch, topic_name)
+                        watched_at = time.monotonic()
+
+                    try:
+                        await asyncio.wait_for(notifications.get(), WATCH_WAKEUP_SECONDS)
+                    except asyncio.TimeoutError:
+                        continue
+                    # One history read covers every notification queued so far
+                    while not notifications.empty():
+                        notifications.get_nowait()
+
+                    try:
+                        message_ids = await self._run_blocking(
+                            self._new_message_ids_from_history, senders
+                        )
+                        emails = (
+                            await self._fetch_and_parse(message_ids, mark_as_read=True)
+                            if message_ids
+                            else []
+                        )
+                    except HttpError as e:
+                        if e.resp.status != 404:
+                            raise
+                        # History ID too old: restart from a fresh watch and
+                        # catch up with a regular poll
+                        logger.warning("Gmail history expired, falling back to a poll")
+                        self._last_history_id = None
+                        watched_at = None
+                        emails = []
+                        for from_email in from_emails or [None]:
+                            emails.extend(await self.poll_once(from_email=from_email))
+
+                    if callback:
+                        for email_info in emails:
+                            await callback(email_info)
+
+                except Exception as e:
+                    logger.error("Error during watch: %s", e)
+                    await asyncio.sleep(self.poll_interval)
+        finally:
+            streaming_pull.cancel()
+            subscriber.close()
+
     def stop_polling(self) -> None:
-        """Stop the polling loop."""
+        """Stop the polling (or watching) loop."""
         logger.info("Stopping Gmail monitor")
         self._running = False
 
+    def stop(self) -> None:
+        """Stop polling and shut down the worker pool.
+
+        Queued Gmail calls are cancelled; calls already running finish in
+        the background. The monitor cannot be used afterwards.
+        """
+        self.stop_polling()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
     def get_downloaded_invoice_path(self, email_info: EmailInfo) -> Path | None:
         """Get the path to a downloaded invoice PDF.
 
@@ -507,10 +988,20 @@ class GmailMonitor:
         if not pdf_attachments:
             return None
 
-        # Find matching downloaded file
-        # Look for invoice_*.pdf files in temp dir
-        for pdf_file in sorted(self._temp_dir.glob("invoice_*.pdf"), reverse=True):
-            # Return most recent
-            return pdf_file
+        # Find matching downloaded file: the most recently written
+        # invoice_*.pdf in temp dir, in one pass
+        try:
+            with os.scandir(self._temp_dir) as entries:
+                latest = max(
+                    (
+                        entry
+                        for entry in entries
+                        if entry.name.startswith("invoice_") and entry.name.endswith(".pdf")
+                    ),
+                    key=lambda entry: entry.stat().st_mtime_ns,
+                    default=None,
+                )
+        except FileNotFoundError:
+            return None
 
-        return None
+        return Path(latest.path) if latest else None
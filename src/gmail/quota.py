@@ -0,0 +1,101 @@
+"""Client-side Gmail API quota limiter.
+
+Gmail allows 250 quota units per user per second. Every API call is
+gated through a shared token bucket so concurrent polls, batches and
+sends stay just under that limit instead of triggering 429 backoffs.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Gmail per-user quota (units per second)
+GMAIL_QUOTA_UNITS_PER_SECOND = 250
+
+# Quota units per call, from the Gmail API usage limits documentation
+QUOTA_UNITS = {
+    "getProfile": 1,
+    "history.list": 2,
+    "messages.list": 5,
+    "messages.get": 5,
+    "messages.modify": 5,
+    "attachments.get": 5,
+    "threads.get": 10,
+    "messages.send": 100,
+    "watch": 100,
+}
+
+# How long the rate stays halved after a 429
+PENALTY_SECONDS = 60
+
+
+class TokenBucket:
+    """Thread-safe token bucket with multiplicative decrease on 429s.
+
+    acquire() blocks, so it is meant for the worker threads the Gmail
+    calls run in (see GmailMonitor._run_blocking), not the event loop.
+
+    Attributes:
+        rate: Tokens added per second (before any penalty).
+        capacity: Maximum tokens the bucket holds.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second.
+            capacity: Maximum tokens the bucket holds.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._penalty_until = 0.0
+        self._lock = threading.Lock()
+
+    def _current_rate(self, now: float) -> float:
+        """Refill rate, halved while a 429 penalty is active."""
+        return self.rate / 2 if now < self._penalty_until else self.rate
+
+    def acquire(self, cost: float = 1) -> None:
+        """Take tokens, sleeping until enough have accumulated.
+
+        Args:
+            cost: Tokens to take; capped at the bucket capacity so large
+                batches wait for a full bucket instead of forever.
+        """
+        cost = min(cost, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                rate = self._current_rate(now)
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate)
+                self._updated = now
+                if self._tokens >= cost:
+                    self._tokens -= cost
+                    return
+                wait = (cost - self._tokens) / rate
+            time.sleep(wait)
+
+    def penalize(self) -> None:
+        """Halve the refill rate for PENALTY_SECONDS after a 429."""
+        with self._lock:
+            self._penalty_until = time.monotonic() + PENALTY_SECONDS
+        logger.warning("Gmail rate limited, halving request rate for %ds", PENALTY_SECONDS)
+
+
+# Shared by every Gmail caller in the process
+gmail_quota = TokenBucket(GMAIL_QUOTA_UNITS_PER_SECOND, GMAIL_QUOTA_UNITS_PER_SECOND)
+
+
+def acquire(method: str, count: int = 1) -> None:
+    """Reserve quota for count calls of a Gmail API method.
+
+    Args:
+        method: Key into QUOTA_UNITS (e.g. "messages.get").
+        count: Number of calls, e.g. the size of a batch.
+    """
+    gmail_quota.acquire(QUOTA_UNITS[method] * count)
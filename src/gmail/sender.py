@@ -4,16 +4,18 @@ Handles sending emails with attachments and replying to threads.
 """
 
 import base64
+import functools
 import logging
 import mimetypes
-from email.mime.base import MIMEBase
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email import encoders
+import mmap
+from email import policy
+from email.message import EmailMessage
+from email.utils import make_msgid
 from pathlib import Path
 
 from googleapiclient.discovery import Resource
 
+from src.gmail import quota
 from src.gmail.auth import get_gmail_service
 from src.config import settings
 
@@ -29,6 +31,7 @@ def _create_message(
     thread_id: str | None = None,
     in_reply_to: str | None = None,
     references: str | None = None,
+    message_id: str | None = None,
 ) -> dict:
     """Create an email message for the Gmail API.
 
@@ -41,36 +44,12 @@ def _create_message(
         thread_id: Thread ID for replies.
         in_reply_to: Message-ID for reply threading.
         references: References header for threading.
+        message_id: Message-ID header to set (Gmail generates one if omitted).
 
     Returns:
         Gmail API message dict with raw encoded content.
     """
-    # Create message with attachment if provided
-    if attachment_path:
-        message = MIMEMultipart()
-        message.attach(MIMEText(body, "plain"))
-
-        # Add attachment
-        attachment_path = Path(attachment_path)
-        content_type, _ = mimetypes.guess_type(str(attachment_path))
-        if content_type is None:
-            content_type = "application/octet-stream"
-
-        main_type, sub_type = content_type.split("/", 1)
-
-        with open(attachment_path, "rb") as f:
-            attachment = MIMEBase(main_type, sub_type)
-            attachment.set_payload(f.read())
-
-        encoders.encode_base64(attachment)
-        attachment.add_header(
-            "Content-Disposition",
-            "attachment",
-            filename=attachment_path.name,
-        )
-        message.attach(attachment)
-    else:
-        message = MIMEText(body, "plain")
+    message = EmailMessage(policy=policy.SMTP)
 
     # Set headers
     message["to"] = to
@@ -79,6 +58,8 @@ def _create_message(
 
     if cc:
         message["cc"] = cc
+    if message_id:
+        message["Message-ID"] = message_id
 
     # Set threading headers for replies
     if in_reply_to:
@@ -86,8 +67,36 @@ def _create_message(
     if references:
         message["References"] = references
 
+    message.set_content(body)
+
+    # Add attachment if provided (base64-encoded once, by add_attachment)
+    if attachment_path:
+        attachment_path = Path(attachment_path)
+        content_type, _ = mimetypes.guess_type(str(attachment_path))
+        if content_type is None:
+            content_type = "application/octet-stream"
+
+        main_type, sub_type = content_type.split("/", 1)
+        attach = functools.partial(
+            message.add_attachment,
+            maintype=main_type,
+            subtype=sub_type,
+            filename=attachment_path.name,
+        )
+        # Memory-map the file so the base64 pass reads the pages directly
+        # instead of from a full in-memory copy (mmap can't map empty files)
+        if attachment_path.stat().st_size:
+            with (
+                open(attachment_path, "rb") as f,
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+                memoryview(mm) as data,
+            ):
+                attach(data)
+        else:
+            attach(b"")
+
     # Encode message
-    raw = base64.urlsafe_b64encode(message.as_bytes()).decode("utf-8")
+    raw = base64.urlsafe_b64encode(bytes(message)).decode("ascii")
 
     result = {"raw": raw}
     if thread_id:
@@ -96,6 +105,15 @@ def _create_message(
     return result
 
 
+def new_message_id() -> str:
+    """Generate a Message-ID header value in the sender's domain.
+
+    Setting the Message-ID ourselves lets callers remember it for later
+    replies without fetching the sent message back from Gmail.
+    """
+    return make_msgid(domain=settings.from_email.rpartition("@")[2] or None)
+
+
 def _send_message(service: Resource, message: dict) -> dict:
     """Send a message via Gmail API.
 
@@ -106,6 +124,7 @@ def _send_message(service: Resource, message: dict) -> dict:
     Returns:
         Gmail API response with id, threadId, labelIds.
     """
+    quota.acquire("messages.send")
     result = service.users().messages().send(userId="me", body=message).execute()
     logger.info("Message sent: id=%s, threadId=%s", result.get("id"), result.get("threadId"))
     return result
@@ -118,6 +137,7 @@ def send_email(
     cc: str | None = None,
     attachment_path: Path | None = None,
     service: Resource | None = None,
+    message_id: str | None = None,
 ) -> tuple[str, str]:
     """Send an email with optional CC and attachment.
 
@@ -128,6 +148,7 @@ def send_email(
         cc: CC recipient email address.
         attachment_path: Path to file to attach.
         service: Gmail API service (created if not provided).
+        message_id: Message-ID header to set (see new_message_id()).
 
     Returns:
         Tuple of (message_id, thread_id).
@@ -144,6 +165,7 @@ def send_email(
         body=body,
         cc=cc,
         attachment_path=attachment_path,
+        message_id=message_id,
     )
 
     result = _send_message(service, message)
@@ -178,10 +200,17 @@ def reply_to_thread(
         service = get_gmail_service()
 
     # Get thread to find original message headers
+    quota.acquire("threads.get")
     thread = (
         service.users()
         .threads()
-        .get(userId="me", id=thread_id, format="metadata", metadataHeaders=["Subject", "Message-ID", "From", "To"])
+        .get(
+            userId="me",
+            id=thread_id,
+            format="metadata",
+            metadataHeaders=["Subject", "Message-ID", "From", "To", "References"],
+            fields="messages/payload/headers",
+        )
         .execute()
     )
 
@@ -194,18 +223,18 @@ def reply_to_thread(
     # Get the last message for reply headers
     last_msg = messages[-1]
 
-    # Extract headers from first message
-    first_headers = {h["name"]: h["value"] for h in first_msg.get("payload", {}).get("headers", [])}
-    last_headers = {h["name"]: h["value"] for h in last_msg.get("payload", {}).get("headers", [])}
+    # Extract headers, keyed by lowercase name (Message-ID vs Message-Id)
+    first_headers = {h["name"].lower(): h["value"] for h in first_msg.get("payload", {}).get("headers", [])}
+    last_headers = {h["name"].lower(): h["value"] for h in last_msg.get("payload", {}).get("headers", [])}
 
-    subject = first_headers.get("Subject", "")
+    subject = first_headers.get("subject", "")
     if not subject.lower().startswith("re:"):
         subject = f"Re: {subject}"
 
     # Get the original recipient (to reply to)
     # If we sent the first message, reply to the From of the last message
     # If someone else sent the first message, reply to them
-    original_from = last_headers.get("From", first_headers.get("From", ""))
+    original_from = last_headers.get("from", first_headers.get("from", ""))
     # Extract just the email address if it's in "Name <email>" format
     if "<" in original_from and ">" in original_from:
         original_to = original_from[original_from.index("<") + 1:original_from.index(">")]
@@ -213,8 +242,8 @@ def reply_to_thread(
         original_to = original_from
 
     # Get Message-ID for threading
-    in_reply_to = last_headers.get("Message-ID")
-    references = last_headers.get("References", "")
+    in_reply_to = last_headers.get("message-id")
+    references = last_headers.get("references", "")
     if in_reply_to:
         if references:
             references = f"{references} {in_reply_to}"
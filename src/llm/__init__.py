@@ -1,6 +1,7 @@
 """LLM integration module."""
 
 from src.llm.gemini import (
+    BatchingGeminiClient,
     GeminiClient,
     get_client,
     is_approval_email,
@@ -8,6 +9,7 @@ from src.llm.gemini import (
 )
 
 __all__ = [
+    "BatchingGeminiClient",
     "GeminiClient",
     "get_client",
     "is_approval_email",
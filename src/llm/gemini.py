@@ -1,43 +1,462 @@
 """Gemini LLM client for email classification and invoice verification."""
 
 import asyncio
+import functools
+import hashlib
+import importlib.util
+import json
 import logging
+import os
+import random
 import re
-from typing import Any
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
 
 import google.generativeai as genai
+import orjson
+from google.api_core.exceptions import (
+    DeadlineExceeded,
+    ResourceExhausted,
+    ServiceUnavailable,
+)
 from google.generativeai.types import GenerateContentResponse
 
 from src.config import settings
 
 logger = logging.getLogger(__name__)
 
+if settings.gemini_api_key:
+    genai.configure(api_key=settings.gemini_api_key)
+
 # Default timeout for API calls (30 seconds)
 DEFAULT_TIMEOUT = 30.0
 
+MODEL_NAME = "gemini-2.0-flash-lite"
+
+# Client-side limits for gemini-2.0-flash-lite (free tier: 30 RPM, 1M TPM)
+MAX_CONCURRENT_REQUESTS = 4
+REQUESTS_PER_MINUTE = 30
+TOKENS_PER_MINUTE = 1_000_000
+# Back-off after a 429 when the error carries no retry delay
+DEFAULT_RETRY_SECONDS = 60.0
+# Attempts per call for transient errors, with exponential backoff from
+# BASE_BACKOFF_SECONDS and +/-25% jitter
+MAX_ATTEMPTS = 3
+BASE_BACKOFF_SECONDS = 1.0
+# Errors worth retrying; anything else (e.g. InvalidArgument) fails at once
+RETRYABLE_ERRORS = (
+    ResourceExhausted,
+    ServiceUnavailable,
+    DeadlineExceeded,
+    asyncio.TimeoutError,
+)
+
+_RETRY_IN_RE = re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE)
+
+# On-disk cache of parsed classification results, keyed by prompt hash
+CACHE_FILE = Path("data/llm_cache.sqlite")
+# Entries older than this are treated as misses and pruned (7 days)
+CACHE_TTL_SECONDS = 7 * 24 * 3600
+# Oldest entries beyond this count are pruned on insert
+CACHE_MAX_ENTRIES = 1000
+
+# Near-duplicate approval emails: local embedding model, on-disk index,
+# minimum cosine similarity to reuse a result, and index size (LRU-evicted)
+SEMANTIC_CACHE_FILE = Path("data/llm_semantic_cache.npz")
+SEMANTIC_MODEL = "all-MiniLM-L6-v2"
+SEMANTIC_THRESHOLD = 0.92
+SEMANTIC_MAX_ENTRIES = 10_000
+
+# BatchingGeminiClient: how long to wait for more classifications and how
+# many to combine into one request
+BATCH_MAX_WAIT_SECONDS = 0.2
+BATCH_MAX_SIZE = 8
+
+# Short emails matching exactly one of the configured approval keywords
+# (settings.approval_keywords) or these rejections, with no negation, hedge
+# or question, are classified without the LLM. Rejections the veto pattern
+# below already catches ("nesuhlasim", "please change") are not listed.
+PREFILTER_MAX_CHARS = 200
+PREFILTER_CONFIDENCE = 0.95
+_REJECT_RE = re.compile(r"\b(rejected|zamietnut|prosim uprav)\b", re.IGNORECASE)
+# Negations ("not approved", "nie je v poriadku", Slovak ne- prefix),
+# qualifiers ("ok, but ..."), complaints and questions; these go to the LLM.
+# They also bypass the semantic cache: embeddings of "approved" and "not
+# approved" are close enough to share a cached result.
+_PREFILTER_VETO_RE = re.compile(
+    r"\b(?:not|no|nie|nic|don'?t|doesn'?t|isn'?t|can'?t|won'?t|but|however|ale|vsak|ne\w+"
+    r"|wrong|incorrect|mistake|fix|change|zle|chyba|oprav\w*|zmen\w*)\b|n't\b|\?",
+    re.IGNORECASE,
+)
+
+# Rough prompt budget for PDF text; ~4 characters per token
+INVOICE_TEXT_BUDGET_TOKENS = 1000
+CHARS_PER_TOKEN = 4
+# Tail of the PDF text mixed into the invoice cache fingerprint
+FINGERPRINT_TAIL_CHARS = 512
+
+_HORIZONTAL_SPACE_RE = re.compile(r"[ \t]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n")
+_CODE_BLOCK_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+# JSON object inside a markdown code block in a single-prompt response
+_JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+
+
+def _truncate_for_llm(text: str, budget_tokens: int = INVOICE_TEXT_BUDGET_TOKENS) -> str:
+    """Fit text into a token budget, collapsing whitespace first.
+
+    PDF extraction pads layouts with runs of spaces and blank lines, so
+    squeezing those out fits more content into the same budget.
+    """
+    chars = budget_tokens * CHARS_PER_TOKEN
+    # Only the part that can survive the cut is normalized
+    text = _HORIZONTAL_SPACE_RE.sub(" ", text[: chars * 2])
+    text = _BLANK_LINES_RE.sub("\n", text)
+    return text[:chars]
+
+
+def _invoice_fingerprint(text: str) -> str:
+    """Cheap cache key for PDF text: what the prompt sees, length and tail."""
+    digest = hashlib.sha1(
+        text[: INVOICE_TEXT_BUDGET_TOKENS * CHARS_PER_TOKEN].encode()
+        + str(len(text)).encode()
+        + text[-FINGERPRINT_TAIL_CHARS:].encode()
+    )
+    return "invoice:" + digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=4)
+def _get_model(name: str) -> genai.GenerativeModel:
+    """Shared model handle per model name, reused by every client."""
+    return genai.GenerativeModel(name)
+
+
+class RateLimiter:
+    """Sliding-window RPM/TPM limiter with a shared 429 back-off.
+
+    Callers wait here instead of sending requests that are bound to be
+    rejected. After a 429, every caller sleeps until the server's retry
+    time, with +/-25% jitter so they do not all fire at once.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = REQUESTS_PER_MINUTE,
+        tokens_per_minute: int = TOKENS_PER_MINUTE,
+    ):
+        """Initialize the limiter.
+
+        Args:
+            requests_per_minute: Maximum requests in any 60s window.
+            tokens_per_minute: Maximum estimated tokens in any 60s window.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        # (monotonic time, estimated tokens) per request in the last minute
+        self._window: deque[tuple[float, int]] = deque()
+        self._window_tokens = 0
+        self._retry_until = 0.0
+
+    async def acquire(self, estimated_tokens: int = 0) -> None:
+        """Wait until a request of estimated_tokens fits in the limits."""
+        estimated_tokens = min(estimated_tokens, self.tokens_per_minute)
+        while True:
+            now = time.monotonic()
+            if now < self._retry_until:
+                await asyncio.sleep((self._retry_until - now) * random.uniform(0.75, 1.25))
+                continue
+
+            while self._window and self._window[0][0] <= now - 60:
+                self._window_tokens -= self._window.popleft()[1]
+
+            if (
+                len(self._window) < self.requests_per_minute
+                and self._window_tokens + estimated_tokens <= self.tokens_per_minute
+            ):
+                self._window.append((now, estimated_tokens))
+                self._window_tokens += estimated_tokens
+                return
+
+            await asyncio.sleep(self._window[0][0] + 60 - now)
+
+    def back_off(self, seconds: float) -> None:
+        """Hold all callers for seconds after a 429."""
+        self._retry_until = max(self._retry_until, time.monotonic() + seconds)
+
+    @property
+    def backing_off(self) -> bool:
+        """Whether a 429 back-off is in effect."""
+        return time.monotonic() < self._retry_until
+
+
+def _retry_delay(error: ResourceExhausted) -> float:
+    """Server-suggested retry delay of a 429, in seconds."""
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+    match = _RETRY_IN_RE.search(str(error))
+    return float(match.group(1)) if match else DEFAULT_RETRY_SECONDS
+
+
+class ResponseCache:
+    """SQLite-backed cache of LLM results keyed by SHA-256 of the prompt.
+
+    Values are stored as JSON, so only JSON-serializable results (the
+    classification tuples) can be cached; tuples come back as tuples.
+    """
+
+    def __init__(
+        self,
+        path: Path | str = CACHE_FILE,
+        ttl_seconds: int = CACHE_TTL_SECONDS,
+        max_entries: int = CACHE_MAX_ENTRIES,
+    ):
+        """Open (or create) the cache database.
+
+        Args:
+            path: SQLite database file.
+            ttl_seconds: Maximum age of an entry before it is ignored.
+            max_entries: Maximum number of entries kept.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value BLOB, created_at INT)"
+            )
+
+    @staticmethod
+    def key_for(prompt: str) -> str:
+        """Cache key for a prompt."""
+        return hashlib.sha256(prompt.encode()).hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ? AND created_at >= ?",
+                (key, int(time.time()) - self.ttl_seconds),
+            ).fetchone()
+        if row is None:
+            return None
+        value = json.loads(row[0])
+        return tuple(value) if isinstance(value, list) else value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value under key, pruning expired and excess entries."""
+        now = int(time.time())
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value).encode(), now),
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?",
+                (now - self.ttl_seconds,),
+            )
+            self._conn.execute(
+                "DELETE FROM responses WHERE key NOT IN "
+                "(SELECT key FROM responses ORDER BY created_at DESC, rowid DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+
+class SemanticCache:
+    """Nearest-neighbour cache of approval results over email embeddings.
+
+    Requires the optional sentence-transformers package (and numpy); use
+    available() before constructing. Embeddings are L2-normalized, so a
+    matrix-vector product gives cosine similarities directly.
+    """
+
+    def __init__(
+        self,
+        path: Path | str = SEMANTIC_CACHE_FILE,
+        threshold: float = SEMANTIC_THRESHOLD,
+        max_entries: int = SEMANTIC_MAX_ENTRIES,
+    ):
+        """Load the index from disk if present.
+
+        Args:
+            path: .npz file the index is persisted to.
+            threshold: Minimum cosine similarity for a hit.
+            max_entries: Maximum rows; the least recently used is replaced.
+        """
+        import numpy as np
+
+        self._np = np
+        self.path = Path(path)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._model = None
+        self._lock = threading.Lock()
+        self._clock = 0
+        # Last embedding computed, so add() after a missed lookup() of the
+        # same text does not embed twice
+        self._last: tuple[str, Any] | None = None
+
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._results: list[tuple] = []
+        self._last_used = np.empty(0, dtype=np.int64)
+        if self.path.exists():
+            self._load()
+
+    @staticmethod
+    def available() -> bool:
+        """Whether the optional embedding dependencies are installed."""
+        return importlib.util.find_spec("sentence_transformers") is not None
+
+    def _load(self) -> None:
+        """Read the persisted index."""
+        try:
+            with self._np.load(self.path, allow_pickle=False) as data:
+                self._matrix = data["embeddings"]
+                self._results = [tuple(json.loads(r)) for r in data["results"]]
+                self._last_used = data["last_used"]
+            self._clock = int(self._last_used.max(initial=0))
+            logger.debug("Loaded %d semantic cache entries", len(self._results))
+        except Exception as e:
+            logger.warning("Failed to load semantic cache %s: %s", self.path, e)
+
+    def _save(self) -> None:
+        """Persist the index atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp.npz")
+        self._np.savez(
+            temp_path,
+            embeddings=self._matrix,
+            results=self._np.array([json.dumps(r) for r in self._results]),
+            last_used=self._last_used,
+        )
+        os.replace(temp_path, self.path)
+
+    def _embed(self, text: str):
+        """Normalized embedding of text (model loaded on first use)."""
+        if self._last is not None and self._last[0] == text:
+            return self._last[1]
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+
+            self._model = SentenceTransformer(SEMANTIC_MODEL)
+        vector = self._model.encode(text, normalize_embeddings=True).astype(self._np.float32)
+        self._last = (text, vector)
+        return vector
+
+    def lookup(self, text: str) -> tuple | None:
+        """Return the result cached for the most similar text, if similar enough.
+
+        Blocking (runs the embedding model); call from a worker thread.
+        """
+        with self._lock:
+            vector = self._embed(text)
+            if not self._results:
+                return None
+            similarities = self._matrix @ vector
+            best = int(similarities.argmax())
+            if similarities[best] < self.threshold:
+                return None
+            self._clock += 1
+            self._last_used[best] = self._clock
+            logger.debug("Semantic cache hit (similarity %.3f)", similarities[best])
+            return self._results[best]
+
+    def add(self, text: str, result: tuple) -> None:
+        """Cache result for text, evicting the least recently used row if full.
+
+        Blocking (embeds and writes to disk); call from a worker thread.
+        """
+        np = self._np
+        with self._lock:
+            vector = self._embed(text)
+            self._clock += 1
+            if len(self._results) < self.max_entries:
+                self._matrix = (
+                    np.vstack([self._matrix, vector]) if self._results else vector[np.newaxis, :]
+                )
+                self._results.append(result)
+                self._last_used = np.append(self._last_used, self._clock)
+            else:
+                row = int(self._last_used.argmin())
+                self._matrix[row] = vector
+                self._results[row] = result
+                self._last_used[row] = self._clock
+            self._save()
+
 
 class GeminiClient:
     """Async client for Gemini LLM API."""
 
-    def __init__(self, api_key: str | None = None, timeout: float = DEFAULT_TIMEOUT):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        cache: ResponseCache | None = None,
+        semantic_cache: SemanticCache | None = None,
+        max_attempts: int = MAX_ATTEMPTS,
+        base_backoff: float = BASE_BACKOFF_SECONDS,
+    ):
         """Initialize the Gemini client.
 
         Args:
             api_key: Gemini API key. If not provided, uses settings.gemini_api_key.
-            timeout: Timeout for API calls in seconds. Defaults to 30s.
+            timeout: Timeout for each API call attempt in seconds.
+                Defaults to 30s.
+            cache: Response cache. If not provided, opens CACHE_FILE.
+            semantic_cache: Near-duplicate cache for approval emails. If not
+                provided, one is created when settings.llm_semantic_cache is
+                enabled and sentence-transformers is installed.
+            max_attempts: Attempts per call for transient errors.
+            base_backoff: Backoff before the first retry, doubled each retry.
         """
         self.api_key = api_key or settings.gemini_api_key
         self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.cache = cache if cache is not None else ResponseCache()
+        if semantic_cache is None and settings.llm_semantic_cache:
+            if SemanticCache.available():
+                semantic_cache = SemanticCache()
+            else:
+                logger.warning("LLM_SEMANTIC_CACHE is set but sentence-transformers is missing")
+        self.semantic_cache = semantic_cache
         self._model: genai.GenerativeModel | None = None
+        self._semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self._rate_limiter = RateLimiter()
+        # Blocking local work (embeddings); API calls themselves are native async
+        self._executor = ThreadPoolExecutor(
+            max_workers=MAX_CONCURRENT_REQUESTS, thread_name_prefix="gemini"
+        )
+
+        # The settings key is configured once at import; only reconfigure
+        # the (process-wide) SDK for an explicitly different key
+        if self.api_key != settings.gemini_api_key:
+            genai.configure(api_key=self.api_key)
+
+    async def close(self) -> None:
+        """Shut down the client's worker threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
-        # Configure the API
-        genai.configure(api_key=self.api_key)
+    @property
+    def rate_limited(self) -> bool:
+        """Whether Gemini is currently backing off after a 429."""
+        return self._rate_limiter.backing_off
 
     @property
     def model(self) -> genai.GenerativeModel:
         """Get or create the generative model (lazy initialization)."""
         if self._model is None:
-            self._model = genai.GenerativeModel("gemini-2.0-flash-lite")
+            self._model = _get_model(MODEL_NAME)
         return self._model
 
     async def generate_text(self, prompt: str) -> str | None:
@@ -49,21 +468,100 @@ class GeminiClient:
         Returns:
             Generated text or None if an error occurred.
         """
+        async with self._semaphore:
+            for attempt in range(self.max_attempts):
+                # Rough token estimate: ~4 characters per token
+                await self._rate_limiter.acquire(estimated_tokens=len(prompt) // 4)
+                try:
+                    return await self._generate_once(prompt)
+                except RETRYABLE_ERRORS as e:
+                    if isinstance(e, ResourceExhausted):
+                        # Hold every caller until the server's retry time
+                        self._rate_limiter.back_off(_retry_delay(e))
+                    error = str(e) or type(e).__name__
+                    if attempt + 1 == self.max_attempts:
+                        logger.warning(
+                            "Gemini API failed after %d attempts: %s", self.max_attempts, error
+                        )
+                        return None
+                    delay = self.base_backoff * 2**attempt * random.uniform(0.75, 1.25)
+                    logger.info(
+                        "Gemini API transient error (attempt %d), retrying in %.1fs: %s",
+                        attempt + 1,
+                        delay,
+                        error,
+                    )
+                    await asyncio.sleep(delay)
+            return None
+
+    async def _generate_once(self, prompt: str) -> str | None:
+        """Make one API call; transient errors propagate for retry."""
         try:
-            # Run the synchronous API call in a thread pool with timeout
-            loop = asyncio.get_event_loop()
+            # Native async SDK call; no thread-pool handoff
             response: GenerateContentResponse = await asyncio.wait_for(
-                loop.run_in_executor(None, self.model.generate_content, prompt),
+                self.model.generate_content_async(prompt),
                 timeout=self.timeout,
             )
             return response.text
-        except asyncio.TimeoutError:
-            logger.warning("Gemini API timeout after %.1f seconds", self.timeout)
-            return None
+        except RETRYABLE_ERRORS:
+            raise
         except Exception as e:
             logger.warning("Gemini API error: %s", str(e))
             return None
 
+    async def _classify(
+        self,
+        prompt: str | Callable[[], str],
+        parse: Callable[[str], tuple],
+        uncertain: tuple,
+        key: str | None = None,
+    ) -> tuple | None:
+        """Generate and parse a response, serving repeats from the cache.
+
+        Only definite results are cached; API errors and unparseable
+        responses (the uncertain tuple) are retried next time.
+
+        Args:
+            prompt: The prompt to send to the model, or a function building
+                it; a function is only called on a cache miss.
+            parse: Parser turning the raw response into a result tuple.
+            uncertain: The parser's fallback result.
+            key: Cache key. Defaults to the hash of the prompt (which must
+                then be a string).
+
+        Returns:
+            Parsed result tuple, or None if the API call failed.
+        """
+        if key is None:
+            key = self.cache.key_for(prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.debug("LLM cache hit for %s", key[:12])
+            return cached
+
+        if callable(prompt):
+            prompt = prompt()
+        result = await self._generate_result(prompt, parse)
+        if result is None:
+            return None
+
+        if result != uncertain:
+            self.cache.set(key, result)
+        return result
+
+    async def _generate_result(
+        self, prompt: str, parse: Callable[[str], tuple]
+    ) -> tuple | None:
+        """Call the API for one prompt and parse the response.
+
+        Returns:
+            Parsed result tuple, or None if the API call failed.
+        """
+        response = await self.generate_text(prompt)
+        if response is None:
+            return None
+        return parse(response)
+
     async def is_approval_email(self, email_body: str) -> tuple[bool, float]:
         """Classify if an email is an approval for a timesheet/invoice.
 
@@ -80,6 +578,15 @@ class GeminiClient:
             - confidence: Float 0-1 indicating confidence level
             Returns (False, 0.0) on API errors (uncertain result).
         """
+        vetoed = _PREFILTER_VETO_RE.search(email_body) is not None
+        # Short, unambiguous replies need no LLM call
+        if len(email_body) <= PREFILTER_MAX_CHARS and not vetoed:
+            approves = settings.approval_keywords_pattern.search(email_body) is not None
+            rejects = _REJECT_RE.search(email_body) is not None
+            if approves != rejects:
+                logger.debug("Email classified by keyword prefilter: is_approval=%s", approves)
+                return (approves, PREFILTER_CONFIDENCE)
+
         prompt = f"""Analyze the following email and determine if it is approving a timesheet or invoice submission.
 
 Email content:
@@ -102,15 +609,30 @@ Consider these as non-approval indicators:
 
 Respond ONLY with the JSON object, no other text."""
 
-        response = await self.generate_text(prompt)
+        loop = asyncio.get_running_loop()
+        # A negated or qualified reply is never served from (or added to) the
+        # semantic cache, whatever its similarity to a cached approval
+        semantic_cache = self.semantic_cache if not vetoed else None
+        if semantic_cache is not None:
+            cached = await loop.run_in_executor(
+                self._executor, semantic_cache.lookup, email_body
+            )
+            if cached is not None:
+                return cached
 
-        if response is None:
+        result = await self._classify(prompt, self._parse_approval_response, (False, 0.0))
+
+        if result is None:
             # API error - return uncertain result
             logger.info("LLM unavailable for email classification, returning uncertain")
             return (False, 0.0)
 
-        # Parse the response
-        return self._parse_approval_response(response)
+        if semantic_cache is not None and result != (False, 0.0):
+            await loop.run_in_executor(
+                self._executor, semantic_cache.add, email_body, result
+            )
+
+        return result
 
     def _parse_approval_response(self, response: str) -> tuple[bool, float]:
         """Parse the LLM response for approval classification.
@@ -127,13 +649,12 @@ Respond ONLY with the JSON object, no other text."""
             json_text = response.strip()
             if json_text.startswith("```"):
                 # Extract content between code blocks
-                match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", json_text, re.DOTALL)
+                match = _JSON_BLOCK_RE.search(json_text)
                 if match:
                     json_text = match.group(1)
 
             # Parse JSON
-            import json
-            data = json.loads(json_text)
+            data = orjson.loads(json_text)
 
             is_approval = bool(data.get("is_approval", False))
             confidence = float(data.get("confidence", 0.0))
@@ -150,7 +671,7 @@ Respond ONLY with the JSON object, no other text."""
 
             return (is_approval, confidence)
 
-        except (json.JSONDecodeError, KeyError, ValueError, TypeError) as e:
+        except (json.JSONDecodeError, orjson.JSONDecodeError, KeyError, ValueError, TypeError) as e:
             logger.warning("Failed to parse LLM approval response: %s", str(e))
             # Return uncertain on parse errors
             return (False, 0.0)
@@ -174,11 +695,12 @@ Respond ONLY with the JSON object, no other text."""
             - total_amount: Extracted total amount or None
             Returns (False, None, None) on API errors (uncertain result).
         """
-        prompt = f"""Analyze the following text extracted from a PDF and determine if it is an invoice.
+        def build_prompt() -> str:
+            return f"""Analyze the following text extracted from a PDF and determine if it is an invoice.
 
 PDF text content:
 ---
-{text_content[:4000]}
+{_truncate_for_llm(text_content)}
 ---
 
 Answer with a JSON object in this exact format:
@@ -194,15 +716,21 @@ Look for these invoice indicators:
 If you cannot find specific fields, use null for those values.
 Respond ONLY with the JSON object, no other text."""
 
-        response = await self.generate_text(prompt)
+        # Fingerprint instead of hashing the full prompt, so a cache hit
+        # skips building (and normalizing) the prompt as well
+        result = await self._classify(
+            build_prompt,
+            self._parse_invoice_response,
+            (False, None, None),
+            key=_invoice_fingerprint(text_content),
+        )
 
-        if response is None:
+        if result is None:
             # API error - return uncertain result
             logger.info("LLM unavailable for invoice verification, returning uncertain")
             return (False, None, None)
 
-        # Parse the response
-        return self._parse_invoice_response(response)
+        return result
 
     def _parse_invoice_response(
         self, response: str
@@ -219,12 +747,11 @@ Respond ONLY with the JSON object, no other text."""
             # Try to extract JSON from the response
             json_text = response.strip()
             if json_text.startswith("```"):
-                match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", json_text, re.DOTALL)
+                match = _JSON_BLOCK_RE.search(json_text)
                 if match:
                     json_text = match.group(1)
 
-            import json
-            data = json.loads(json_text)
+            data = orjson.loads(json_text)
 
             is_invoice = bool(data.get("is_invoice", False))
             invoice_number = data.get("invoice_number")
@@ -250,22 +777,158 @@ Respond ONLY with the JSON object, no other text."""
 
             return (is_invoice, invoice_number, total_amount)
 
-        except (json.JSONDecodeError, KeyError, ValueError, TypeError) as e:
+        except (json.JSONDecodeError, orjson.JSONDecodeError, KeyError, ValueError, TypeError) as e:
             logger.warning("Failed to parse LLM invoice response: %s", str(e))
             # Return uncertain on parse errors
             return (False, None, None)
 
 
-# Convenience functions using a shared client instance
-_default_client: GeminiClient | None = None
+class BatchingGeminiClient(GeminiClient):
+    """Gemini client that coalesces concurrent classifications.
 
+    Cache misses are queued; a background task collects them for up to
+    max_wait seconds (or max_batch prompts) and sends them as one request
+    asking for a JSON array with one answer per prompt. This trades a
+    short delay for fewer requests against the per-minute quota.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        max_wait: float = BATCH_MAX_WAIT_SECONDS,
+        max_batch: int = BATCH_MAX_SIZE,
+        **kwargs: Any,
+    ):
+        """Initialize the client.
 
+        Args:
+            *args: Passed to GeminiClient.
+            max_wait: Seconds to wait for more prompts after the first.
+            max_batch: Maximum prompts per request.
+            **kwargs: Passed to GeminiClient.
+        """
+        super().__init__(*args, **kwargs)
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue[tuple[str, Callable[[str], tuple], asyncio.Future]] = (
+            asyncio.Queue()
+        )
+        self._worker: asyncio.Task | None = None
+
+    async def _generate_result(
+        self, prompt: str, parse: Callable[[str], tuple]
+    ) -> tuple | None:
+        """Queue the prompt for the next batch and wait for its result."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run_batches())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((prompt, parse, future))
+        return await future
+
+    async def close(self) -> None:
+        """Stop the batching task and the client's worker threads.
+
+        Prompts still queued or in flight resolve to None, as for a failed
+        API call, so no caller is left waiting.
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        while not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_result(None)
+        await super().close()
+
+    async def _run_batches(self) -> None:
+        """Collect queued prompts into batches and resolve their futures."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+                try:
+                    results = await self._send_batch(
+                        [(prompt, parse) for prompt, parse, _ in batch]
+                    )
+                except Exception as e:
+                    logger.warning("Gemini batch failed: %s", e)
+                    results = [None] * len(batch)
+                for (_, _, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            finally:
+                # Cancelled by close() mid-batch: fail the batch, don't strand it
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+
+    async def _send_batch(
+        self, items: list[tuple[str, Callable[[str], tuple]]]
+    ) -> list[tuple | None]:
+        """Classify several prompts with one API call.
+
+        Falls back to one call per prompt if the combined answer cannot be
+        matched up with the prompts.
+        """
+        if len(items) == 1:
+            prompt, parse = items[0]
+            return [await super()._generate_result(prompt, parse)]
+
+        sections = "\n\n".join(
+            f"===TASK_{i}===\n{prompt}" for i, (prompt, _) in enumerate(items, 1)
+        )
+        combined = (
+            f"Answer each of the {len(items)} tasks below. Respond with a JSON array of "
+            f"{len(items)} objects, one per task, in task order. Each object must use the "
+            f"format requested by its task. Respond ONLY with the JSON array, no other text."
+            f"\n\n{sections}"
+        )
+        response = await self.generate_text(combined)
+        if response is None:
+            return [None] * len(items)
+
+        answers = self._parse_batch_response(response)
+        if answers is None or len(answers) != len(items):
+            logger.warning("Unusable batched Gemini response, classifying individually")
+            return [await super()._generate_result(prompt, parse) for prompt, parse in items]
+
+        logger.debug("Classified %d prompts in one Gemini request", len(items))
+        return [parse(orjson.dumps(answer).decode()) for (_, parse), answer in zip(items, answers)]
+
+    @staticmethod
+    def _parse_batch_response(response: str) -> list | None:
+        """Extract the JSON array from a batched response."""
+        json_text = response.strip()
+        if json_text.startswith("```"):
+            match = _CODE_BLOCK_RE.search(json_text)
+            if match:
+                json_text = match.group(1)
+        try:
+            data = orjson.loads(json_text)
+        except orjson.JSONDecodeError:
+            return None
+        return data if isinstance(data, list) else None
+
+
+# Convenience functions using a shared client instance
+@functools.cache
 def get_client() -> GeminiClient:
     """Get or create the default Gemini client."""
-    global _default_client
-    if _default_client is None:
-        _default_client = GeminiClient()
-    return _default_client
+    return GeminiClient()
 
 
 async def is_approval_email(email_body: str) -> tuple[bool, float]:
@@ -2,15 +2,27 @@
 
 import asyncio
 import logging
+import os
 import signal
 import sys
 from pathlib import Path
 
+from googleapiclient.errors import HttpError
+
+try:
+    import uvloop
+except ImportError:  # Optional; Windows and minimal installs use stdlib asyncio
+    uvloop = None
+
 from src.config import settings
 from src.watcher import FolderWatcher
 from src.telegram.bot import TelegramBot, ApprovalResult
+from src.gmail import quota
+from src.gmail.auth import get_gmail_service
 from src.gmail.monitor import GmailMonitor
-from src.llm.gemini import GeminiClient
+from src.llm.gemini import BatchingGeminiClient, GeminiClient
+from src.models import ApprovalResultEvent, EmailReceivedEvent, NewTimesheetEvent
+from src.pdf import close_shared_converter
 from src.workflow import WorkflowCoordinator
 
 # Configure logging - WARNING level to reduce noise
@@ -22,9 +34,12 @@ logging.basicConfig(
     ],
 )
 logger = logging.getLogger(__name__)
-# Set our app loggers to INFO for important messages
-logging.getLogger("src").setLevel(logging.INFO)
-logging.getLogger("__main__").setLevel(logging.INFO)
+# Set our app loggers to the configured level (INFO by default)
+logging.getLogger("src").setLevel(settings.log_level.upper())
+logging.getLogger("__main__").setLevel(settings.log_level.upper())
+
+# Upper bound for the adaptive Gmail poll interval (seconds)
+MAX_POLL_INTERVAL = 300
 
 
 class InvoiceAutomationService:
@@ -37,6 +52,11 @@ class InvoiceAutomationService:
         self.llm: GeminiClient | None = None
         self.workflow: WorkflowCoordinator | None = None
         self._shutdown_event = asyncio.Event()
+        # Gmail history ID of the last thread check; replies are read
+        # incrementally from here instead of re-fetching whole threads
+        self._last_history_id: str | None = None
+        # Consecutive thread checks without replies, for adaptive polling
+        self._idle_polls = 0
 
     async def start(self) -> None:
         """Initialize and start all components."""
@@ -51,11 +71,10 @@ class InvoiceAutomationService:
         self.watcher = FolderWatcher()
         self.bot = TelegramBot()
         self.gmail_monitor = GmailMonitor()
-        self.llm = GeminiClient()
+        self.llm = BatchingGeminiClient()
 
         # Verify Gmail credentials at startup (triggers OAuth if needed)
         logger.info("Checking Gmail credentials...")
-        from src.gmail.auth import get_gmail_service
         get_gmail_service()  # This will prompt for OAuth if no token
         logger.info("Gmail credentials OK")
 
@@ -67,10 +86,7 @@ class InvoiceAutomationService:
 
         # Set up Telegram callback handler
         async def on_approval(result: ApprovalResult):
-            await self.workflow.handle_event({
-                "type": "approval_result",
-                "result": result,
-            })
+            await self.workflow.handle_event(ApprovalResultEvent(result))
         self.bot.set_callback_handler(on_approval)
 
         # Set up reset handler
@@ -78,13 +94,15 @@ class InvoiceAutomationService:
             self.workflow.data.reset()
             self.workflow._save_state()
             # Clear temp files
-            import shutil
-            from pathlib import Path
-            for f in Path("data/temp").glob("*"):
-                if f.is_file():
-                    f.unlink()
-            for f in Path("data/incoming").glob("*.pdf"):
-                f.unlink()
+            # scandir entries carry the file type, so no extra stat per file
+            with os.scandir("data/temp") as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        os.unlink(entry.path)
+            with os.scandir("data/incoming") as entries:
+                for entry in entries:
+                    if entry.name.endswith(".pdf") and entry.is_file(follow_symlinks=False):
+                        os.unlink(entry.path)
             logger.info("Workflow reset via Telegram command")
         self.bot.set_reset_handler(on_reset)
 
@@ -115,22 +133,25 @@ class InvoiceAutomationService:
 
     async def _run_folder_watcher(self) -> None:
         """Watch for new timesheet PDFs."""
+        # Wake only on a new file or shutdown, never on a timer
+        shutdown = asyncio.ensure_future(self._shutdown_event.wait())
         try:
-            while not self._shutdown_event.is_set():
-                try:
-                    event = await asyncio.wait_for(
-                        self.watcher.get_event(),
-                        timeout=5.0,
-                    )
-                    logger.info(f"New PDF detected: {event.file_path}")
-                    await self.workflow.handle_event({
-                        "type": "new_timesheet",
-                        "path": event.file_path,
-                    })
-                except asyncio.TimeoutError:
-                    continue
+            while True:
+                next_event = asyncio.ensure_future(self.watcher.get_event())
+                await asyncio.wait(
+                    {next_event, shutdown}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not next_event.done():
+                    next_event.cancel()
+                    break
+
+                event = next_event.result()
+                logger.info(f"New PDF detected: {event.file_path}")
+                await self.workflow.handle_event(NewTimesheetEvent(event.file_path))
         except asyncio.CancelledError:
             logger.info("Folder watcher task cancelled")
+        finally:
+            shutdown.cancel()
 
     async def _run_gmail_monitor(self) -> None:
         """Monitor Gmail for incoming emails by checking specific threads."""
@@ -139,45 +160,36 @@ class InvoiceAutomationService:
                 try:
                     # Only check when in WAITING_DOCS state
                     if self.workflow.data.state.value != "WAITING_DOCS":
+                        self._idle_polls = 0
                         await asyncio.sleep(10)
                         continue
 
                     logger.info("Checking Gmail threads for replies...")
 
-                    # Check manager thread for approval
+                    # Manager thread for approval, accountant thread for invoice
+                    threads = []
                     if (
                         self.workflow.data.manager_thread_id
                         and not self.workflow.data.approval_received
                     ):
                         logger.info(f"Checking manager thread: {self.workflow.data.manager_thread_id}")
-                        emails = await self._check_thread_for_replies(
-                            self.workflow.data.manager_thread_id,
-                        )
-                        for email in emails:
-                            logger.info(f"Reply in manager thread from: {email.from_email}")
-                            await self.workflow.handle_event({
-                                "type": "email_received",
-                                "email": email,
-                            })
-
-                    # Check accountant thread for invoice
+                        threads.append(("manager", self.workflow.data.manager_thread_id))
                     if (
                         self.workflow.data.accountant_thread_id
                         and not self.workflow.data.invoice_received
                     ):
                         logger.info(f"Checking accountant thread: {self.workflow.data.accountant_thread_id}")
-                        emails = await self._check_thread_for_replies(
-                            self.workflow.data.accountant_thread_id,
-                        )
-                        for email in emails:
-                            logger.info(f"Reply in accountant thread from: {email.from_email}")
-                            await self.workflow.handle_event({
-                                "type": "email_received",
-                                "email": email,
-                            })
-
-                    # Wait for poll interval
-                    await asyncio.sleep(self.gmail_monitor.poll_interval)
+                        threads.append(("accountant", self.workflow.data.accountant_thread_id))
+
+                    replies = await self._check_threads_for_replies(
+                        [thread_id for _, thread_id in threads]
+                    )
+                    for role, thread_id in threads:
+                        for email in replies.get(thread_id, []):
+                            logger.info(f"Reply in {role} thread from: {email.from_email}")
+                            await self.workflow.handle_event(EmailReceivedEvent(email))
+
+                    await asyncio.sleep(self._next_poll_interval(any(replies.values())))
 
                 except Exception as e:
                     logger.error(f"Gmail monitor error: {e}")
@@ -186,42 +198,122 @@ class InvoiceAutomationService:
         except asyncio.CancelledError:
             logger.info("Gmail monitor task cancelled")
 
-    async def _check_thread_for_replies(self, thread_id: str) -> list:
-        """Check a thread for replies (any message after the initial sent message).
+    def _next_poll_interval(self, had_replies: bool) -> float:
+        """Seconds until the next thread check.
+
+        Doubles the configured interval for every consecutive check without
+        replies (up to MAX_POLL_INTERVAL), resets after a reply, and doubles
+        again while Gemini is rate limited since replies could not be
+        classified promptly anyway.
+        """
+        base = self.gmail_monitor.poll_interval
+        self._idle_polls = 0 if had_replies else self._idle_polls + 1
+        # Cap the exponent; the interval is capped below anyway
+        interval = base * 2 ** min(self._idle_polls, 16)
+        if self.llm is not None and self.llm.rate_limited:
+            interval *= 2
+        return min(interval, max(base, MAX_POLL_INTERVAL))
+
+    async def _check_threads_for_replies(self, thread_ids: list[str]) -> dict[str, list]:
+        """Check threads for replies (any message after the initial sent message).
+
+        After the first check only messages added to the inbox since the
+        last history ID are read (one history.list call when nothing new
+        arrived). The first check, and any check after Gmail has expired
+        the history ID (~7 days), fetches the threads in full.
 
         We don't need UNREAD filter because:
         - approval_received/invoice_received flags prevent re-checking threads
         - Once a reply is found and processed, the flag is set True
         - Thread is never checked again after that
+
+        Returns:
+            Replies per thread ID.
         """
-        from src.models import EmailInfo
+        run_blocking = self.gmail_monitor._run_blocking
+        if self._last_history_id is not None:
+            try:
+                return await run_blocking(self._fetch_new_replies, thread_ids)
+            except HttpError as e:
+                if e.resp.status != 404:
+                    logger.error(f"Error checking threads for replies: {e}")
+                    return {}
+                logger.info("Gmail history expired, re-fetching threads in full")
+            except Exception as e:
+                logger.error(f"Error checking threads for replies: {e}")
+                return {}
 
         try:
-            service = self.gmail_monitor.service
-            thread = service.users().threads().get(
-                userId="me", id=thread_id
-            ).execute()
-
-            replies = []
-            messages = thread.get("messages", [])
-
-            for msg in messages:
-                msg_id = msg["id"]
-
-                # Skip the initial sent message (first message in thread)
-                if msg_id == thread_id:
-                    continue
-
-                # Any other message is a reply - parse it
-                email_info = self.gmail_monitor._parse_message(msg)
-                replies.append(email_info)
-
-            return replies
-
+            # Seed the cursor before reading so nothing arriving meanwhile is missed
+            history_id = await run_blocking(self.gmail_monitor._current_history_id)
         except Exception as e:
-            logger.error(f"Error checking thread {thread_id}: {e}")
+            logger.error(f"Error checking threads for replies: {e}")
+            return {}
+
+        # Gmail client is sync; poll the threads concurrently in worker
+        # threads. One failing thread must not discard the others' replies.
+        results = await asyncio.gather(
+            *(run_blocking(self._fetch_thread_replies, thread_id) for thread_id in thread_ids),
+            return_exceptions=True,
+        )
+        replies: dict[str, list] = {}
+        for thread_id, result in zip(thread_ids, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error checking thread {thread_id}: {result}")
+            else:
+                replies[thread_id] = result
+
+        # Only switch to incremental checks once every thread was read in full
+        if len(replies) == len(thread_ids):
+            self._last_history_id = history_id
+        return replies
+
+    def _fetch_new_replies(self, thread_ids: list[str]) -> dict[str, list]:
+        """Fetch and parse replies added since the last history ID (blocking Gmail calls)."""
+        monitor = self.gmail_monitor
+        wanted = set(thread_ids)
+        messages, history_id = monitor._list_added_messages(self._last_history_id, "INBOX")
+        reply_ids = [
+            message["id"]
+            for message in messages
+            if message.get("threadId") in wanted and message["id"] != message["threadId"]
+        ]
+
+        replies: dict[str, list] = {thread_id: [] for thread_id in thread_ids}
+        details = monitor._get_message_details(reply_ids) if reply_ids else {}
+        for message in messages:
+            if message["id"] in details:
+                replies[message["threadId"]].append(monitor._parse_message(details[message["id"]]))
+
+        self._last_history_id = history_id
+        return replies
+
+    def _fetch_thread_replies(self, thread_id: str) -> list:
+        """Fetch and parse all replies in a thread (blocking Gmail calls)."""
+        # IDs and labels only - full bodies are fetched just for the replies below
+        monitor = self.gmail_monitor
+        quota.acquire("threads.get")
+        thread = monitor.service.users().threads().get(
+            userId="me",
+            id=thread_id,
+            format="minimal",
+            fields="messages(id,labelIds)",
+        ).execute()
+
+        # Replies are the inbound (INBOX) messages other than the initial
+        # sent message, which is the first message in the thread
+        reply_ids = [
+            msg["id"]
+            for msg in thread.get("messages", [])
+            if msg["id"] != thread_id and "INBOX" in msg.get("labelIds", [])
+        ]
+        if not reply_ids:
             return []
 
+        # Fetch all replies in full with one batch request
+        details = monitor._get_message_details(reply_ids)
+        return [monitor._parse_message(details[msg_id]) for msg_id in reply_ids if msg_id in details]
+
     async def _wait_for_shutdown(self) -> None:
         """Wait for shutdown signal."""
         await self._shutdown_event.wait()
@@ -237,6 +329,11 @@ class InvoiceAutomationService:
             await self.watcher.stop()
         if self.bot:
             await self.bot.shutdown()
+        if self.llm:
+            await self.llm.close()
+        if self.gmail_monitor:
+            self.gmail_monitor.stop()
+        await close_shared_converter()
 
         logger.info("Service stopped")
 
@@ -246,7 +343,7 @@ async def main() -> None:
     service = InvoiceAutomationService()
 
     # Set up signal handlers for graceful shutdown
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
 
     def signal_handler():
         logger.info("Received shutdown signal")
@@ -272,4 +369,7 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
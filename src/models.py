@@ -1,9 +1,21 @@
 """Data models for the invoice automation workflow."""
 
+from dataclasses import dataclass, fields
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from pydantic import BaseModel, Field
+from typing import TYPE_CHECKING, Any
+
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from src.telegram.bot import ApprovalResult
+
+# Slovak month names, indexed by month - 1
+_MONTHS_SK: tuple[str, ...] = (
+    "januar", "februar", "marec", "april", "maj", "jun",
+    "jul", "august", "september", "oktober", "november", "december",
+)
 
 
 class WorkflowState(str, Enum):
@@ -16,7 +28,8 @@ class WorkflowState(str, Enum):
     COMPLETE = "COMPLETE"
 
 
-class TimesheetInfo(BaseModel):
+@dataclass(slots=True)
+class TimesheetInfo:
     """Information extracted from a timesheet PDF."""
 
     total_hours: int
@@ -37,15 +50,16 @@ class TimesheetInfo(BaseModel):
     @property
     def month_name(self) -> str:
         """Get month name in Slovak."""
-        months = [
-            "januar", "februar", "marec", "april", "maj", "jun",
-            "jul", "august", "september", "oktober", "november", "december"
-        ]
-        return months[self.month - 1]
+        return _MONTHS_SK[self.month - 1]
 
 
-class WorkflowData(BaseModel):
-    """Persisted workflow state and data."""
+@dataclass(slots=True)
+class WorkflowData:
+    """Persisted workflow state and data.
+
+    A plain slotted dataclass rather than a pydantic model: it is mutated
+    throughout the workflow and only validated when loaded from disk.
+    """
 
     state: WorkflowState = WorkflowState.IDLE
 
@@ -61,6 +75,11 @@ class WorkflowData(BaseModel):
     manager_thread_id: str | None = None
     accountant_thread_id: str | None = None
 
+    # Headers of the first message in each thread (Subject, Message-ID),
+    # cached at send time so replies don't need to fetch the thread
+    manager_first_msg_headers: dict[str, str] | None = None
+    accountant_first_msg_headers: dict[str, str] | None = None
+
     # Downloaded files
     invoice_pdf_path: Path | None = None
     approval_email_html: str | None = None
@@ -80,11 +99,37 @@ class WorkflowData(BaseModel):
         self.invoice_received = False
         self.manager_thread_id = None
         self.accountant_thread_id = None
+        self.manager_first_msg_headers = None
+        self.accountant_first_msg_headers = None
         self.invoice_pdf_path = None
         self.approval_email_html = None
         self.waiting_since = None
         self.telegram_message_id = None
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "WorkflowData":
+        """Rebuild workflow data from its JSON form (see WorkflowCoordinator._save_state).
+
+        Unknown keys are ignored so older state files still load.
+
+        Raises:
+            ValueError: If a value cannot be converted to its field type.
+        """
+        known = {f.name for f in fields(cls)}
+        values = {key: value for key, value in data.items() if key in known}
+
+        if "state" in values:
+            values["state"] = WorkflowState(values["state"])
+        for key in ("timesheet_path", "invoice_pdf_path"):
+            if values.get(key) is not None:
+                values[key] = Path(values[key])
+        if values.get("timesheet_info") is not None:
+            values["timesheet_info"] = TimesheetInfo(**values["timesheet_info"])
+        if values.get("waiting_since") is not None:
+            values["waiting_since"] = datetime.fromisoformat(values["waiting_since"])
+
+        return cls(**values)
+
 
 class EmailInfo(BaseModel):
     """Information about a received email."""
@@ -92,9 +137,35 @@ class EmailInfo(BaseModel):
     message_id: str
     thread_id: str
     from_email: str
-    to_emails: list[str] = Field(default_factory=list)
-    cc_emails: list[str] = Field(default_factory=list)
+    # Immutable tuples: the empty default is shared instead of a new list per instance
+    to_emails: tuple[str, ...] = ()
+    cc_emails: tuple[str, ...] = ()
     subject: str
     body_text: str = ""
     body_html: str = ""
-    attachments: list[str] = Field(default_factory=list)  # List of attachment filenames
+    attachments: tuple[str, ...] = ()  # Attachment filenames
+
+
+@dataclass(slots=True, frozen=True)
+class NewTimesheetEvent:
+    """A timesheet PDF appeared in the watch folder."""
+
+    path: Path
+
+
+@dataclass(slots=True, frozen=True)
+class ApprovalResultEvent:
+    """The user answered a Telegram approval prompt."""
+
+    result: "ApprovalResult"
+
+
+@dataclass(slots=True, frozen=True)
+class EmailReceivedEvent:
+    """A reply arrived in a watched Gmail thread."""
+
+    email: EmailInfo
+
+
+# Events queued to WorkflowCoordinator.handle_event
+WorkflowEvent = NewTimesheetEvent | ApprovalResultEvent | EmailReceivedEvent
@@ -4,11 +4,19 @@ This module provides:
 - Timesheet PDF parsing (extract hours, dates)
 - PDF merging (invoice + timesheet + approval)
 - HTML to PDF conversion (for approval emails)
+- Test timesheet/invoice PDF generation
 """
 
-from src.pdf.html_to_pdf import HtmlToPdfConverter, HtmlToPdfError, html_to_pdf
-from src.pdf.merger import PdfMergeError, merge_pdf_files, merge_pdfs
+from src.pdf.html_to_pdf import (
+    HtmlToPdfConverter,
+    HtmlToPdfError,
+    close_shared_converter,
+    get_shared_converter,
+    html_to_pdf,
+)
+from src.pdf.merger import PdfMergeError, merge_pdf_files, merge_pdf_files_async, merge_pdfs
 from src.pdf.parser import TimesheetParseError, parse_timesheet
+from src.pdf.templates import create_invoice_pdf, create_timesheet
 
 __all__ = [
     # Parser
@@ -17,9 +25,15 @@ __all__ = [
     # Merger
     "merge_pdfs",
     "merge_pdf_files",
+    "merge_pdf_files_async",
     "PdfMergeError",
     # HTML to PDF
     "HtmlToPdfConverter",
     "html_to_pdf",
+    "get_shared_converter",
+    "close_shared_converter",
     "HtmlToPdfError",
+    # Test PDFs
+    "create_timesheet",
+    "create_invoice_pdf",
 ]
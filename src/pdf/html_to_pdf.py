@@ -1,17 +1,39 @@
 """HTML to PDF converter using Playwright."""
 
 import asyncio
+import contextlib
 import logging
+import os
+import re
 from pathlib import Path
-from typing import Self
+from typing import Literal, Self
 
-from playwright.async_api import Browser, async_playwright, Playwright
+from playwright.async_api import Browser, BrowserContext, async_playwright, Playwright
+
+from src.config import settings
+from src.pdf import html_to_pdf_weasy
 
 logger = logging.getLogger(__name__)
 
 # Default timeout for PDF conversion (30 seconds)
 DEFAULT_TIMEOUT_MS = 30000
 
+# Pre-warmed browser contexts shared by conversions
+DEFAULT_POOL_SIZE = 4
+
+# HTML that loads scripts or remote resources must wait for the network
+# to go idle; anything else is fully rendered at DOMContentLoaded
+_EXTERNAL_ASSET_RE = re.compile(
+    r"<script|<link\b|<iframe|\bsrc\s*=\s*[\"']?(?:https?:)?//|url\(\s*[\"']?(?:https?:)?//",
+    re.IGNORECASE,
+)
+
+# HTML that needs a browser (scripts or embedded frames); anything else
+# can be rendered by WeasyPrint when it is installed
+_DYNAMIC_CONTENT_RE = re.compile(r"<script|<iframe", re.IGNORECASE)
+
+WaitUntil = Literal["commit", "domcontentloaded", "load", "networkidle"]
+
 
 class HtmlToPdfError(Exception):
     """Error raised when HTML to PDF conversion fails."""
@@ -19,13 +41,69 @@ class HtmlToPdfError(Exception):
     pass
 
 
+# One Chromium per process, shared by every converter (each converter
+# still gets its own contexts); reference-counted so the last close stops it
+_shared_playwright: Playwright | None = None
+_shared_browser: Browser | None = None
+_shared_users = 0
+_shared_lock = asyncio.Lock()
+
+
+async def get_shared_browser() -> Browser:
+    """Get the process-wide browser, starting or connecting to it if needed.
+
+    Connects over CDP when settings.chromium_cdp_url is set, so separate
+    processes can share one Chromium; otherwise launches headless Chromium.
+    Every call must be paired with release_shared_browser().
+    """
+    global _shared_playwright, _shared_browser, _shared_users
+
+    async with _shared_lock:
+        if _shared_browser is None or not _shared_browser.is_connected():
+            if _shared_playwright is None:
+                _shared_playwright = await async_playwright().start()
+            if settings.chromium_cdp_url:
+                logger.debug("Connecting to Chromium at %s...", settings.chromium_cdp_url)
+                _shared_browser = await _shared_playwright.chromium.connect_over_cdp(
+                    settings.chromium_cdp_url
+                )
+            else:
+                logger.debug("Starting Playwright browser...")
+                _shared_browser = await _shared_playwright.chromium.launch(headless=True)
+            logger.info("Playwright browser started")
+        _shared_users += 1
+        return _shared_browser
+
+
+async def release_shared_browser() -> None:
+    """Drop one reference to the shared browser, closing it after the last."""
+    global _shared_playwright, _shared_browser, _shared_users
+
+    async with _shared_lock:
+        _shared_users = max(0, _shared_users - 1)
+        if _shared_users:
+            return
+        if _shared_browser is not None:
+            logger.debug("Closing Playwright browser...")
+            # A crashed browser may fail to close; it is gone either way
+            with contextlib.suppress(Exception):
+                await _shared_browser.close()
+            _shared_browser = None
+        if _shared_playwright is not None:
+            await _shared_playwright.stop()
+            _shared_playwright = None
+            logger.info("Playwright browser closed")
+
+
 class HtmlToPdfConverter:
     """
     Converts HTML content to PDF using Playwright (headless Chromium).
 
     Features:
     - Lazy browser initialization (starts on first use)
-    - Reuses browser instance across conversions
+    - Shares one browser per process across converters and conversions
+    - Pool of pre-warmed browser contexts; each conversion only opens a page
+    - Batch conversion (convert_many) reusing one page for many documents
     - Configurable timeout
     - Graceful shutdown
 
@@ -39,16 +117,18 @@ class HtmlToPdfConverter:
         await converter.close()
     """
 
-    def __init__(self, timeout_ms: int = DEFAULT_TIMEOUT_MS):
+    def __init__(self, timeout_ms: int = DEFAULT_TIMEOUT_MS, pool_size: int = DEFAULT_POOL_SIZE):
         """
         Initialize the converter.
 
         Args:
             timeout_ms: Timeout in milliseconds for PDF generation.
+            pool_size: Number of browser contexts (concurrent conversions).
         """
         self._timeout_ms = timeout_ms
-        self._playwright: Playwright | None = None
+        self._pool_size = pool_size
         self._browser: Browser | None = None
+        self._context_pool: asyncio.Queue[BrowserContext] = asyncio.Queue(maxsize=pool_size)
         self._lock = asyncio.Lock()
 
     async def __aenter__(self) -> Self:
@@ -63,22 +143,26 @@ class HtmlToPdfConverter:
         """
         Ensure browser is initialized, starting it if needed.
 
-        Thread-safe via asyncio lock.
+        A browser that crashed or lost its CDP connection is released and
+        replaced, with a fresh context pool. Thread-safe via asyncio lock.
         """
-        if self._browser is not None:
+        if self._browser is not None and self._browser.is_connected():
             return self._browser
 
         async with self._lock:
             # Double-check after acquiring lock
             if self._browser is not None:
-                return self._browser
+                if self._browser.is_connected():
+                    return self._browser
+                logger.warning("Playwright browser disconnected, restarting")
+                await self._drain_pool()
+                self._browser = None
+                await release_shared_browser()
 
-            logger.debug("Starting Playwright browser...")
-            self._playwright = await async_playwright().start()
-            self._browser = await self._playwright.chromium.launch(
-                headless=True,
-            )
-            logger.info("Playwright browser started")
+            browser = await get_shared_browser()
+            for _ in range(self._pool_size):
+                self._context_pool.put_nowait(await browser.new_context())
+            self._browser = browser
             return self._browser
 
     async def convert(
@@ -87,14 +171,22 @@ class HtmlToPdfConverter:
         output_path: Path | str,
         *,
         timeout_ms: int | None = None,
+        wait_until: WaitUntil | None = None,
     ) -> Path:
         """
         Convert HTML string to PDF file.
 
+        Static HTML (no scripts, stylesheet links, iframes or remote
+        images) is rendered as soon as the DOM is loaded; "networkidle",
+        which idles 500ms after the last request, is only used when such
+        external assets are present.
+
         Args:
             html: HTML content to convert.
             output_path: Path for the output PDF file.
             timeout_ms: Optional timeout override in milliseconds.
+            wait_until: Page load state to wait for; detected from the HTML
+                when not given.
 
         Returns:
             Path to the generated PDF file.
@@ -102,40 +194,92 @@ class HtmlToPdfConverter:
         Raises:
             HtmlToPdfError: If conversion fails or times out.
         """
-        output_path = Path(output_path)
+        [result] = await self.convert_many(
+            [(html, output_path)], timeout_ms=timeout_ms, wait_until=wait_until
+        )
+        return result
+
+    async def convert_many(
+        self,
+        docs: list[tuple[str, Path | str]],
+        *,
+        timeout_ms: int | None = None,
+        wait_until: WaitUntil | None = None,
+    ) -> list[Path]:
+        """
+        Convert several HTML documents to PDF files on one page.
+
+        The page is opened once and reused for every document, so each
+        PDF costs only set_content and pdf round-trips to Chromium.
+
+        Args:
+            docs: (HTML content, output path) pairs, converted in order.
+            timeout_ms: Optional timeout override in milliseconds.
+            wait_until: Page load state to wait for; detected from each
+                document's HTML when not given (see convert()).
+
+        Returns:
+            Paths to the generated PDF files, in the order of docs.
+
+        Raises:
+            HtmlToPdfError: If any conversion fails or times out.
+        """
         timeout = timeout_ms if timeout_ms is not None else self._timeout_ms
+        results = []
 
         try:
-            browser = await self._ensure_browser()
+            await self._ensure_browser()
 
-            # Create a new page for this conversion
-            page = await browser.new_page()
+            # Check out a pre-warmed context; only the page is new
+            context = await self._context_pool.get()
+            page = None
 
             try:
-                # Set content with timeout
-                await page.set_content(html, timeout=timeout, wait_until="networkidle")
-
-                # Ensure output directory exists
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-
-                # Generate PDF
-                await page.pdf(
-                    path=str(output_path),
-                    format="A4",
-                    print_background=True,
-                    margin={
-                        "top": "20mm",
-                        "bottom": "20mm",
-                        "left": "15mm",
-                        "right": "15mm",
-                    },
-                )
-
-                logger.info("Generated PDF: %s", output_path)
-                return output_path
+                page = await context.new_page()
+
+                for html, output_path in docs:
+                    if not isinstance(output_path, Path):
+                        output_path = Path(output_path)
+                    doc_wait_until = wait_until or (
+                        "networkidle" if _EXTERNAL_ASSET_RE.search(html) else "domcontentloaded"
+                    )
+
+                    # Set content with timeout
+                    await page.set_content(html, timeout=timeout, wait_until=doc_wait_until)
+
+                    # Ensure output directory exists
+                    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+                    # Generate PDF
+                    await page.pdf(
+                        path=os.fspath(output_path),
+                        format="A4",
+                        print_background=True,
+                        margin={
+                            "top": "20mm",
+                            "bottom": "20mm",
+                            "left": "15mm",
+                            "right": "15mm",
+                        },
+                    )
+
+                    logger.info("Generated PDF: %s", output_path)
+                    results.append(output_path)
+
+                return results
 
             finally:
-                await page.close()
+                if page is not None:
+                    # Fails if the browser died mid-conversion; the
+                    # conversion error is the one worth raising
+                    with contextlib.suppress(Exception):
+                        await page.close()
+                if context.browser is self._browser and self._browser.is_connected():
+                    self._context_pool.put_nowait(context)
+                else:
+                    # Context of a dead or replaced browser; don't pool it
+                    with contextlib.suppress(Exception):
+                        await context.close()
 
         except asyncio.TimeoutError as e:
             logger.error("PDF conversion timed out after %dms", timeout)
@@ -144,22 +288,56 @@ class HtmlToPdfConverter:
             logger.error("PDF conversion failed: %s", e)
             raise HtmlToPdfError(f"PDF conversion failed: {e}") from e
 
+    async def _drain_pool(self) -> None:
+        """Close every pooled context (errors from a dead browser are ignored)."""
+        while not self._context_pool.empty():
+            with contextlib.suppress(Exception):
+                await self._context_pool.get_nowait().close()
+
     async def close(self) -> None:
         """
-        Close the browser and cleanup resources.
+        Close this converter's contexts and release the shared browser.
 
         Safe to call multiple times.
         """
         async with self._lock:
+            await self._drain_pool()
+
             if self._browser is not None:
-                logger.debug("Closing Playwright browser...")
-                await self._browser.close()
                 self._browser = None
+                await release_shared_browser()
+
+
+# Converter behind html_to_pdf(), kept warm between calls
+_shared_converter: HtmlToPdfConverter | None = None
+_shared_converter_lock = asyncio.Lock()
 
-            if self._playwright is not None:
-                await self._playwright.stop()
-                self._playwright = None
-                logger.info("Playwright browser closed")
+
+async def get_shared_converter() -> HtmlToPdfConverter:
+    """Get the process-wide converter, creating it on first use.
+
+    Its browser and contexts start lazily and stay up until
+    close_shared_converter() is called.
+    """
+    global _shared_converter
+
+    async with _shared_converter_lock:
+        if _shared_converter is None:
+            _shared_converter = HtmlToPdfConverter()
+        return _shared_converter
+
+
+async def close_shared_converter() -> None:
+    """Close the process-wide converter, if one was created.
+
+    Call on shutdown; a later html_to_pdf() starts a new one.
+    """
+    global _shared_converter
+
+    async with _shared_converter_lock:
+        if _shared_converter is not None:
+            await _shared_converter.close()
+            _shared_converter = None
 
 
 # Convenience function for one-off conversions
@@ -172,8 +350,11 @@ async def html_to_pdf(
     """
     Convert HTML to PDF (convenience function).
 
-    For multiple conversions, use HtmlToPdfConverter context manager
-    to reuse the browser instance.
+    Static HTML (no scripts or iframes) is rendered with WeasyPrint when
+    it is installed, without starting Chromium. Otherwise, or if
+    WeasyPrint fails, the shared converter is used, so only the first
+    call pays for starting the browser; call close_shared_converter()
+    on shutdown.
 
     Args:
         html: HTML content to convert.
@@ -186,8 +367,14 @@ async def html_to_pdf(
     Raises:
         HtmlToPdfError: If conversion fails.
     """
-    async with HtmlToPdfConverter(timeout_ms=timeout_ms) as converter:
-        return await converter.convert(html, output_path)
+    if html_to_pdf_weasy.available() and not _DYNAMIC_CONTENT_RE.search(html):
+        try:
+            return await asyncio.to_thread(html_to_pdf_weasy.render_weasy, html, output_path)
+        except Exception as e:
+            logger.warning("WeasyPrint rendering failed, falling back to Playwright: %s", e)
+
+    converter = await get_shared_converter()
+    return await converter.convert(html, output_path, timeout_ms=timeout_ms)
 
 
 # CLI entry point for testing
@@ -234,6 +421,8 @@ if __name__ == "__main__":
         except HtmlToPdfError as e:
             print(f"Error: {e}")
             sys.exit(1)
+        finally:
+            await close_shared_converter()
 
     logging.basicConfig(level=logging.DEBUG)
     asyncio.run(main())
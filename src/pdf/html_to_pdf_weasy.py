@@ -0,0 +1,65 @@
+"""HTML to PDF rendering with WeasyPrint (no browser).
+
+Used by html_to_pdf() for static HTML such as approval emails, so the
+common case never starts Chromium. Requires the optional weasyprint
+package; check available() first.
+"""
+
+import importlib.util
+import logging
+import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Same page setup as the Playwright path (A4, 20mm top/bottom, 15mm sides)
+PAGE_CSS = "@page { size: A4; margin: 20mm 15mm; }"
+
+# The HTML embeds email bodies we don't control, so resources are limited to
+# inline data: URLs and remote http(s) fetches. file: URLs (and <link
+# rel=attachment>) would otherwise let an email pull local files into the PDF.
+ALLOWED_URL_SCHEMES = ("data:", "http:", "https:")
+URL_FETCH_TIMEOUT = 5  # seconds per remote resource
+
+
+def available() -> bool:
+    """Whether the optional weasyprint package is installed."""
+    return importlib.util.find_spec("weasyprint") is not None
+
+
+def _safe_url_fetcher(url: str, timeout: int = URL_FETCH_TIMEOUT, ssl_context=None) -> dict:
+    """WeasyPrint url_fetcher that only allows ALLOWED_URL_SCHEMES."""
+    from weasyprint import default_url_fetcher
+
+    if not url.lower().startswith(ALLOWED_URL_SCHEMES):
+        raise ValueError(f"Blocked resource URL: {url[:100]}")
+    return default_url_fetcher(
+        url, timeout=min(timeout, URL_FETCH_TIMEOUT), ssl_context=ssl_context
+    )
+
+
+def render_weasy(html: str, output_path: Path | str) -> Path:
+    """
+    Render HTML to a PDF file with WeasyPrint.
+
+    Blocking; run it in a worker thread from async code.
+
+    Args:
+        html: HTML content to render.
+        output_path: Path for the output PDF file.
+
+    Returns:
+        Path to the generated PDF file.
+    """
+    from weasyprint import CSS, HTML
+
+    if not isinstance(output_path, Path):
+        output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    HTML(string=html, url_fetcher=_safe_url_fetcher).write_pdf(
+        os.fspath(output_path), stylesheets=[CSS(string=PAGE_CSS)]
+    )
+
+    logger.info("Generated PDF with WeasyPrint: %s", output_path)
+    return output_path
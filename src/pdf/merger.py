@@ -1,6 +1,10 @@
 """PDF merger for combining invoice, timesheet, and approval PDFs."""
 
+import asyncio
+import io
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from pypdf import PdfReader, PdfWriter
@@ -8,12 +12,87 @@ from pypdf import PdfReader, PdfWriter
 logger = logging.getLogger(__name__)
 
 
+# Output file buffer size for merged PDFs
+WRITE_BUFFER_SIZE = 1 << 20
+# Merges whose inputs exceed this are streamed to disk instead of
+# serialized in memory first (50 MiB)
+IN_MEMORY_WRITE_LIMIT = 50 << 20
+
+
 class PdfMergeError(Exception):
     """Error raised when PDF merging fails."""
 
     pass
 
 
+def _as_path(path: Path | str) -> Path:
+    """Return path as a Path, without copying one that already is."""
+    return path if isinstance(path, Path) else Path(path)
+
+
+def _read_pdfs(paths: list[Path]) -> list[PdfReader]:
+    """Open and parse the input PDFs concurrently, preserving order."""
+    if len(paths) == 1:
+        return [PdfReader(paths[0])]
+    with ThreadPoolExecutor(max_workers=len(paths), thread_name_prefix="pdf-read") as executor:
+        return list(executor.map(PdfReader, paths))
+
+
+def _write_merged(
+    readers: list[PdfReader],
+    names: list[str],
+    output_path: Path,
+    input_bytes: int,
+) -> int:
+    """Append readers in order and write the merged PDF.
+
+    The PDF is written to a temporary file next to output_path and moved
+    into place with os.replace, so a crash never leaves a half-written
+    merge behind.
+
+    Args:
+        readers: Parsed input PDFs, in merge order.
+        names: Input names for logging.
+        output_path: Destination of the merged PDF.
+        input_bytes: Combined size of the inputs, to decide whether the
+            output is serialized in memory first.
+
+    Returns:
+        Total number of pages written.
+    """
+    writer = PdfWriter()
+    # Page counts are only needed for the debug log
+    debug = logger.isEnabledFor(logging.DEBUG)
+    for reader, name in zip(readers, names):
+        pages_before = len(writer.pages) if debug else 0
+        writer.append(reader)
+        if debug:
+            logger.debug("Added %d pages from %s", len(writer.pages) - pages_before, name)
+
+    # Ensure output directory exists
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    try:
+        if input_bytes <= IN_MEMORY_WRITE_LIMIT:
+            # Serialize in memory, then hand the file one large write
+            buffer = io.BytesIO()
+            writer.write(buffer)
+            with open(tmp_path, "wb") as output_file:
+                output_file.write(buffer.getbuffer())
+        else:
+            # Large merges: stream through a 1 MiB buffer instead of holding
+            # a second copy in memory (pypdf emits many small writes)
+            with open(tmp_path, "wb", buffering=WRITE_BUFFER_SIZE) as output_file:
+                writer.write(output_file)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return len(writer.pages)
+
+
 def merge_pdfs(
     invoice_path: Path | str,
     timesheet_path: Path | str,
@@ -36,10 +115,10 @@ def merge_pdfs(
         PdfMergeError: If merging fails.
         FileNotFoundError: If any input file doesn't exist.
     """
-    invoice_path = Path(invoice_path)
-    timesheet_path = Path(timesheet_path)
-    approval_path = Path(approval_path)
-    output_path = Path(output_path)
+    invoice_path = _as_path(invoice_path)
+    timesheet_path = _as_path(timesheet_path)
+    approval_path = _as_path(approval_path)
+    output_path = _as_path(output_path)
 
     # Validate input files exist
     for path, name in [
@@ -51,28 +130,15 @@ def merge_pdfs(
             raise FileNotFoundError(f"{name} PDF not found: {path}")
 
     try:
-        writer = PdfWriter()
-
         # Merge in order: invoice -> timesheet -> approval
-        for path, name in [
-            (invoice_path, "invoice"),
-            (timesheet_path, "timesheet"),
-            (approval_path, "approval"),
-        ]:
-            logger.debug("Adding %s: %s", name, path)
-            reader = PdfReader(path)
-            for page in reader.pages:
-                writer.add_page(page)
-            logger.debug("Added %d pages from %s", len(reader.pages), name)
-
-        # Ensure output directory exists
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Write merged PDF
-        with open(output_path, "wb") as output_file:
-            writer.write(output_file)
-
-        total_pages = len(writer.pages)
+        input_paths = [invoice_path, timesheet_path, approval_path]
+        readers = _read_pdfs(input_paths)
+        total_pages = _write_merged(
+            readers,
+            ["invoice", "timesheet", "approval"],
+            output_path,
+            sum(p.stat().st_size for p in input_paths),
+        )
         logger.info("Merged %d pages into %s", total_pages, output_path)
 
         return output_path
@@ -108,8 +174,8 @@ def merge_pdf_files(
     if not input_paths:
         raise ValueError("At least one input PDF path is required")
 
-    input_paths = [Path(p) for p in input_paths]
-    output_path = Path(output_path)
+    input_paths = [_as_path(p) for p in input_paths]
+    output_path = _as_path(output_path)
 
     # Validate all input files exist
     for path in input_paths:
@@ -117,29 +183,71 @@ def merge_pdf_files(
             raise FileNotFoundError(f"PDF not found: {path}")
 
     try:
-        writer = PdfWriter()
+        readers = _read_pdfs(input_paths)
+        total_pages = _write_merged(
+            readers,
+            [p.name for p in input_paths],
+            output_path,
+            sum(p.stat().st_size for p in input_paths),
+        )
+        logger.info("Merged %d PDFs (%d pages) into %s", len(input_paths), total_pages, output_path)
+
+        return output_path
+
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        logger.error("Failed to merge PDFs: %s", e)
+        raise PdfMergeError(f"Failed to merge PDFs: {e}") from e
 
-        for path in input_paths:
-            logger.debug("Adding: %s", path)
-            reader = PdfReader(path)
-            for page in reader.pages:
-                writer.add_page(page)
-            logger.debug("Added %d pages from %s", len(reader.pages), path.name)
 
-        # Ensure output directory exists
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+async def merge_pdf_files_async(
+    input_paths: list[Path | str],
+    output_path: Path | str,
+) -> Path:
+    """
+    Merge multiple PDFs in the order provided, without blocking the event loop.
 
-        # Write merged PDF
-        with open(output_path, "wb") as output_file:
-            writer.write(output_file)
+    Inputs are parsed concurrently in worker threads; the merged file is
+    then assembled and written in one more worker thread.
+
+    Args:
+        input_paths: List of paths to input PDFs (in merge order).
+        output_path: Path for the merged output PDF.
 
-        total_pages = len(writer.pages)
+    Returns:
+        Path to the merged PDF file.
+
+    Raises:
+        PdfMergeError: If merging fails.
+        FileNotFoundError: If any input file doesn't exist.
+        ValueError: If no input paths provided.
+    """
+    if not input_paths:
+        raise ValueError("At least one input PDF path is required")
+
+    input_paths = [_as_path(p) for p in input_paths]
+    output_path = _as_path(output_path)
+
+    for path in input_paths:
+        if not path.exists():
+            raise FileNotFoundError(f"PDF not found: {path}")
+
+    try:
+        readers = await asyncio.gather(
+            *(asyncio.to_thread(PdfReader, path) for path in input_paths)
+        )
+        total_pages = await asyncio.to_thread(
+            _write_merged,
+            list(readers),
+            [p.name for p in input_paths],
+            output_path,
+            sum(p.stat().st_size for p in input_paths),
+        )
         logger.info("Merged %d PDFs (%d pages) into %s", len(input_paths), total_pages, output_path)
 
         return output_path
 
-    except FileNotFoundError:
-        raise
     except Exception as e:
         logger.error("Failed to merge PDFs: %s", e)
         raise PdfMergeError(f"Failed to merge PDFs: {e}") from e
@@ -1,15 +1,101 @@
 """PDF parser for extracting data from Jira timesheet PDFs."""
 
+import contextlib
+import functools
+import hashlib
 import logging
 import re
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
 from pathlib import Path
 
-import pdfplumber
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # Fall back to pypdf (always installed), slower
+    pdfium = None
 
 from src.models import TimesheetInfo
 
 logger = logging.getLogger(__name__)
 
+# Parsed timesheets keyed by parser version and SHA-256 of the PDF, so
+# restarts and retries skip text extraction; least recently used entries
+# beyond the limit are pruned
+TIMESHEET_CACHE_FILE = Path("data/timesheet_cache.sqlite")
+TIMESHEET_CACHE_MAX_ENTRIES = 100
+# Larger files are parsed without hashing (5 MiB)
+TIMESHEET_CACHE_MAX_FILE_BYTES = 5 << 20
+# Part of every cache key: bump it whenever a parser change can alter the
+# result for the same PDF, so entries from the old parser are never served
+# (they age out through the LRU pruning)
+TIMESHEET_PARSER_VERSION = 2
+
+_cache_lock = threading.Lock()
+
+# Trust the first page when it alone has a labelled total and a period:
+# Jira puts the summary there, so later pages are never extracted
+SUMMARY_PAGE_FIRST = True
+
+# Common patterns for total hours in Jira timesheets, fused into one
+# alternation so the text is scanned once; group names give the priority.
+# Each alternative is a zero-width lookahead so a match never consumes text
+# another pattern needs (finditer does not return overlapping matches), and
+# no two alternatives can match at the same position.
+_FUSED_TOTAL_RE = re.compile(
+    "|".join(f"(?={pattern})" for pattern in [
+        # "Total: 160h" or "Total: 160 h"
+        r"(?:Total[:\s]+(?P<a>\d+)\s*h)",
+        # "Total Hours: 160"
+        r"(?:Total\s+Hours[:\s]+(?P<b>\d+))",
+        # "Logged: 160h"
+        r"(?:Logged[:\s]+(?P<c>\d+)\s*h)",
+        # "Sum: 160h"
+        r"(?:Sum[:\s]+(?P<d>\d+)\s*h)",
+        # "160h total" (on one line, or it would also match "8h\nTotal: 160h")
+        r"(?:(?P<e>\d+)[^\S\n]*h[^\S\n]+total)",
+        # Look for standalone hour values at end of document (common in summaries)
+        r"(?:\b(?P<f>\d{2,3})\s*h?\s*$)",
+    ]),
+    re.IGNORECASE | re.MULTILINE,
+)
+_TOTAL_PRIORITY = "abcdef"
+# Fallback: every "NNh" value in the document
+_ALL_HOURS_RE = re.compile(r"\b(\d{2,3})\s*h\b", re.IGNORECASE)
+
+# Date range formats fused into one alternation, in priority order; each
+# alternative is an outer named group (so match.lastgroup names it) with
+# start/end groups. Possessive quantifiers stop backtracking on runs that
+# can never be re-split.
+_FUSED_DATE_RE = re.compile(
+    "|".join([
+        # "DD/Mon/YY - DD/Mon/YY"
+        r"(?P<slash>(?P<slash_start>\d{1,2}+/[A-Za-z]{3}/\d{2})\s*+[-–—]\s*+"
+        r"(?P<slash_end>\d{1,2}+/[A-Za-z]{3}/\d{2}))",
+        # "01 Jan 2026 - 31 Jan 2026"
+        r"(?P<long>(?P<long_start>\d{1,2}+\s++[A-Za-z]{3}\s++\d{4})\s*+[-–—]\s*+"
+        r"(?P<long_end>\d{1,2}+\s++[A-Za-z]{3}\s++\d{4}))",
+        # "January 1-31, 2026" (kept verbatim)
+        r"(?P<words>[A-Za-z]++\s++\d{1,2}+\s*+[-–—]\s*+\d{1,2}+,?\s*+\d{4})",
+        # "2026-01-01 - 2026-01-31"
+        r"(?P<iso>(?P<iso_start>\d{4}-\d{2}-\d{2})\s*+[-–—]\s*+(?P<iso_end>\d{4}-\d{2}-\d{2}))",
+    ])
+)
+_DATE_PRIORITY = ("slash", "long", "words", "iso")
+
+# Month number by English month abbreviation (full names are looked up
+# by their first three letters)
+_MONTH_MAP: dict[str, int] = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4,
+    "may": 5, "jun": 6, "jul": 7, "aug": 8,
+    "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+# Month name and 2- or 4-digit year within a date range
+_MONTH_RE = re.compile(r"([A-Za-z]{3,})")
+_YEAR_RE = re.compile(r"/(\d{2})(?:\s|$|-)|(\d{4})")
+
 
 class TimesheetParseError(Exception):
     """Error raised when timesheet parsing fails."""
@@ -21,6 +107,9 @@ def parse_timesheet(pdf_path: Path | str) -> TimesheetInfo:
     """
     Extract timesheet information from a Jira timesheet PDF.
 
+    Results are cached on disk by file content, so the same PDF is only
+    parsed once.
+
     Args:
         pdf_path: Path to the timesheet PDF file.
 
@@ -31,11 +120,21 @@ def parse_timesheet(pdf_path: Path | str) -> TimesheetInfo:
         TimesheetParseError: If extraction fails.
         FileNotFoundError: If the PDF file doesn't exist.
     """
-    pdf_path = Path(pdf_path)
+    if not isinstance(pdf_path, Path):
+        pdf_path = Path(pdf_path)
 
     if not pdf_path.exists():
         raise FileNotFoundError(f"Timesheet PDF not found: {pdf_path}")
 
+    cache_key = None
+    if pdf_path.stat().st_size < TIMESHEET_CACHE_MAX_FILE_BYTES:
+        digest = hashlib.sha256(pdf_path.read_bytes()).hexdigest()
+        cache_key = f"v{TIMESHEET_PARSER_VERSION}:{digest}"
+        cached = _cache_get(cache_key)
+        if cached is not None:
+            logger.debug("Timesheet cache hit for %s", pdf_path)
+            return cached
+
     try:
         text = _extract_text(pdf_path)
         total_hours = _extract_total_hours(text)
@@ -56,6 +155,8 @@ def parse_timesheet(pdf_path: Path | str) -> TimesheetInfo:
             info.year,
         )
 
+        if cache_key is not None:
+            _cache_set(cache_key, info)
         return info
 
     except TimesheetParseError:
@@ -65,15 +166,139 @@ def parse_timesheet(pdf_path: Path | str) -> TimesheetInfo:
         raise TimesheetParseError(f"Failed to parse timesheet: {e}") from e
 
 
+@functools.cache
+def _cache_connection() -> sqlite3.Connection:
+    """Open (or create) the parsed-timesheet cache database."""
+    TIMESHEET_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(TIMESHEET_CACHE_FILE), check_same_thread=False)
+    with conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS timesheets (key TEXT PRIMARY KEY, "
+            "total_hours INT, date_range TEXT, month INT, year INT, used_at REAL)"
+        )
+    return conn
+
+
+def _cache_get(key: str) -> TimesheetInfo | None:
+    """Return the cached parse result for a PDF hash, or None.
+
+    Cache errors are logged and treated as a miss.
+    """
+    try:
+        with _cache_lock:
+            conn = _cache_connection()
+            row = conn.execute(
+                "SELECT total_hours, date_range, month, year FROM timesheets WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            with conn:
+                conn.execute(
+                    "UPDATE timesheets SET used_at = ? WHERE key = ?", (time.time(), key)
+                )
+    except sqlite3.Error as e:
+        logger.warning("Timesheet cache read failed: %s", e)
+        return None
+
+    total_hours, date_range, month, year = row
+    return TimesheetInfo(total_hours=total_hours, date_range=date_range, month=month, year=year)
+
+
+def _cache_set(key: str, info: TimesheetInfo) -> None:
+    """Store a parse result, pruning least recently used entries.
+
+    Cache errors are logged and ignored.
+    """
+    try:
+        with _cache_lock:
+            conn = _cache_connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO timesheets VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, info.total_hours, info.date_range, info.month, info.year, time.time()),
+                )
+                conn.execute(
+                    "DELETE FROM timesheets WHERE key NOT IN "
+                    "(SELECT key FROM timesheets ORDER BY used_at DESC LIMIT ?)",
+                    (TIMESHEET_CACHE_MAX_ENTRIES,),
+                )
+    except sqlite3.Error as e:
+        logger.warning("Timesheet cache write failed: %s", e)
+
+
+def _iter_page_text(pdf_path: Path) -> Iterator[str]:
+    """Yield the text of each PDF page in order.
+
+    Uses PDFium (no layout analysis needed for the timesheet regexes),
+    or pypdf when pypdfium2 is not installed. Pages after the one the
+    caller stops at are never extracted.
+    """
+    if pdfium is not None:
+        pdf = pdfium.PdfDocument(str(pdf_path))
+        try:
+            for page in pdf:
+                textpage = page.get_textpage()
+                # PDFium separates lines with CRLF
+                text = textpage.get_text_range().replace("\r\n", "\n")
+                textpage.close()
+                page.close()
+                yield text
+        finally:
+            pdf.close()
+    else:
+        from pypdf import PdfReader
+
+        for page in PdfReader(pdf_path).pages:
+            yield page.extract_text() or ""
+
+
+def _has_summary(text: str) -> bool:
+    """Check whether text already determines the parse result.
+
+    True once it holds a "DD/Mon/YY - DD/Mon/YY" range and a valid
+    "Total: NNh" line, the top-priority patterns, so later pages cannot
+    change what _extract_total_hours and _extract_date_range return.
+    """
+    if _DATE_PRIORITY[0] not in _first_date_matches(text):
+        return False
+    # An out-of-range first "Total:" never wins, so the result then
+    # depends on lower-priority patterns that later pages may contain
+    return _is_valid_hours(_first_total_matches(text).get(_TOTAL_PRIORITY[0]))
+
+
+def _is_summary_page(text: str) -> bool:
+    """Check whether a single page holds a labelled total and a period.
+
+    Labelled means any total-hours pattern except the bare end-of-line
+    number, which also matches dates and would make any page qualify.
+    """
+    if not _first_date_matches(text):
+        return False
+    return any(
+        match.lastgroup != _TOTAL_PRIORITY[-1] and 1 <= int(match[match.lastgroup]) <= 500
+        for match in _FUSED_TOTAL_RE.finditer(text)
+    )
+
+
 def _extract_text(pdf_path: Path) -> str:
-    """Extract all text from PDF."""
+    """Extract text from PDF, stopping after the summary page.
+
+    Jira timesheets put the total and period on the first page. With
+    SUMMARY_PAGE_FIRST, a first page that has both is used on its own;
+    otherwise pages are added until the text seen so far contains the
+    top-priority patterns, or every page has been read.
+    """
     text_parts = []
 
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text()
+    with contextlib.closing(_iter_page_text(pdf_path)) as pages:
+        for page_text in pages:
             if page_text:
                 text_parts.append(page_text)
+                if SUMMARY_PAGE_FIRST and len(text_parts) == 1 and _is_summary_page(page_text):
+                    break
+                if _has_summary("\n".join(text_parts)):
+                    break
 
     full_text = "\n".join(text_parts)
 
@@ -84,6 +309,26 @@ def _extract_text(pdf_path: Path) -> str:
     return full_text
 
 
+def _is_valid_hours(hours: int | None) -> bool:
+    """Sanity check: hours should be reasonable (1-500 for monthly timesheet)."""
+    return hours is not None and 1 <= hours <= 500
+
+
+def _first_total_matches(text: str) -> dict[str, int]:
+    """First match of each total-hours pattern, found in a single scan.
+
+    Like one re.search per pattern: only a pattern's first match counts.
+    The scan stops early only once a valid top-priority match is seen,
+    since nothing found later can outrank it.
+    """
+    first_matches: dict[str, int] = {}
+    for match in _FUSED_TOTAL_RE.finditer(text):
+        first_matches.setdefault(match.lastgroup, int(match[match.lastgroup]))
+        if _is_valid_hours(first_matches.get(_TOTAL_PRIORITY[0])):
+            break
+    return first_matches
+
+
 def _extract_total_hours(text: str) -> int:
     """
     Extract total hours from timesheet text.
@@ -94,33 +339,18 @@ def _extract_total_hours(text: str) -> int:
     - "Logged: 160h"
     - Lines ending with total hours value
     """
-    # Common patterns for total hours in Jira timesheets
-    patterns = [
-        # "Total: 160h" or "Total: 160 h"
-        r"Total[:\s]+(\d+)\s*h",
-        # "Total Hours: 160"
-        r"Total\s+Hours[:\s]+(\d+)",
-        # "Logged: 160h"
-        r"Logged[:\s]+(\d+)\s*h",
-        # "Sum: 160h"
-        r"Sum[:\s]+(\d+)\s*h",
-        # "160h total"
-        r"(\d+)\s*h\s+total",
-        # Look for standalone hour values at end of document (common in summaries)
-        r"\b(\d{2,3})\s*h?\s*$",
-    ]
+    # A match earlier in the text does not outrank a higher-priority
+    # pattern found later
+    first_matches = _first_total_matches(text)
 
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
-        if match:
-            hours = int(match.group(1))
-            # Sanity check: hours should be reasonable (1-500 for monthly timesheet)
-            if 1 <= hours <= 500:
-                logger.debug("Found total hours: %d (pattern: %s)", hours, pattern)
-                return hours
+    for name in _TOTAL_PRIORITY:
+        hours = first_matches.get(name)
+        if _is_valid_hours(hours):
+            logger.debug("Found total hours: %d (pattern: %s)", hours, name)
+            return hours
 
     # Fallback: look for the largest reasonable hour value in the document
-    all_hours = re.findall(r"\b(\d{2,3})\s*h\b", text, re.IGNORECASE)
+    all_hours = _ALL_HOURS_RE.findall(text)
     if all_hours:
         hours_values = [int(h) for h in all_hours if 1 <= int(h) <= 500]
         if hours_values:
@@ -132,36 +362,33 @@ def _extract_total_hours(text: str) -> int:
     raise TimesheetParseError("Could not extract total hours from timesheet")
 
 
+def _first_date_matches(text: str) -> dict[str, re.Match[str]]:
+    """First match of each date range format, found in a single scan."""
+    first_matches: dict[str, re.Match[str]] = {}
+    for match in _FUSED_DATE_RE.finditer(text):
+        first_matches.setdefault(match.lastgroup, match)
+        if match.lastgroup == _DATE_PRIORITY[0]:
+            break
+    return first_matches
+
+
 def _extract_date_range(text: str) -> str:
     """
     Extract date range from timesheet text.
 
     Expects format like: "01/Jan/26 - 31/Jan/26"
     """
-    # Pattern for "DD/Mon/YY - DD/Mon/YY"
-    pattern = r"(\d{1,2}/[A-Za-z]{3}/\d{2})\s*[-–—]\s*(\d{1,2}/[A-Za-z]{3}/\d{2})"
-    match = re.search(pattern, text)
-    if match:
-        date_range = f"{match.group(1)} - {match.group(2)}"
-        logger.debug("Found date range: %s", date_range)
-        return date_range
-
-    # Alternative patterns
-    alt_patterns = [
-        # "01 Jan 2026 - 31 Jan 2026"
-        r"(\d{1,2}\s+[A-Za-z]{3}\s+\d{4})\s*[-–—]\s*(\d{1,2}\s+[A-Za-z]{3}\s+\d{4})",
-        # "January 1-31, 2026"
-        r"([A-Za-z]+)\s+(\d{1,2})\s*[-–—]\s*(\d{1,2}),?\s*(\d{4})",
-        # "2026-01-01 - 2026-01-31"
-        r"(\d{4}-\d{2}-\d{2})\s*[-–—]\s*(\d{4}-\d{2}-\d{2})",
-    ]
+    first_matches = _first_date_matches(text)
 
-    for alt_pattern in alt_patterns:
-        match = re.search(alt_pattern, text)
+    for name in _DATE_PRIORITY:
+        match = first_matches.get(name)
         if match:
-            # Normalize to expected format if possible
-            date_range = " - ".join(match.groups()[:2]) if len(match.groups()) <= 2 else match.group(0)
-            logger.debug("Found date range (alt): %s", date_range)
+            if name == "words":
+                date_range = match[name]
+            else:
+                # Normalize to "start - end"
+                date_range = f"{match[name + '_start']} - {match[name + '_end']}"
+            logger.debug("Found date range (%s): %s", name, date_range)
             return date_range
 
     raise TimesheetParseError("Could not extract date range from timesheet")
@@ -177,27 +404,18 @@ def _parse_month_year(date_range: str) -> tuple[int, int]:
     Returns:
         Tuple of (month, year) where month is 1-12 and year is 4-digit.
     """
-    month_map = {
-        "jan": 1, "feb": 2, "mar": 3, "apr": 4,
-        "may": 5, "jun": 6, "jul": 7, "aug": 8,
-        "sep": 9, "oct": 10, "nov": 11, "dec": 12,
-        "january": 1, "february": 2, "march": 3, "april": 4,
-        "june": 6, "july": 7, "august": 8,
-        "september": 9, "october": 10, "november": 11, "december": 12,
-    }
-
     # Try to extract month name
-    month_match = re.search(r"([A-Za-z]{3,})", date_range)
+    month_match = _MONTH_RE.search(date_range)
     if not month_match:
         raise TimesheetParseError(f"Could not extract month from date range: {date_range}")
 
     month_str = month_match.group(1).lower()
-    month = month_map.get(month_str[:3])
+    month = _MONTH_MAP.get(month_str[:3])
     if month is None:
         raise TimesheetParseError(f"Unknown month: {month_str}")
 
     # Try to extract year (2-digit or 4-digit)
-    year_match = re.search(r"/(\d{2})(?:\s|$|-)|(\d{4})", date_range)
+    year_match = _YEAR_RE.search(date_range)
     if not year_match:
         raise TimesheetParseError(f"Could not extract year from date range: {date_range}")
 
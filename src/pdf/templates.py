@@ -0,0 +1,140 @@
+"""Test PDF generation (timesheet and invoice) from cached templates."""
+
+import functools
+import io
+import logging
+from pathlib import Path
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Templates are rendered once, uncompressed, with fixed-width slots; values
+# are space-padded to the slot width so xref byte offsets stay valid
+SLOT_WIDTH = 16
+
+
+def _slot(name: str) -> str:
+    """Placeholder text for a template slot."""
+    return name.ljust(SLOT_WIDTH, "@")
+
+
+def _fill_template(template: bytes, values: dict[str, str]) -> bytes:
+    """Substitute slot values into a cached PDF template.
+
+    Raises:
+        ValueError: If a value is wider than the slot.
+    """
+    pdf = template
+    for name, value in values.items():
+        if len(value) > SLOT_WIDTH:
+            raise ValueError(f"Value too long for PDF template slot {name}: {value}")
+        pdf = pdf.replace(_slot(name).encode(), value.ljust(SLOT_WIDTH).encode())
+    return pdf
+
+
+@functools.cache
+def _timesheet_template() -> bytes:
+    """Render the timesheet PDF once, with a slot for total hours."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4, pageCompression=0)
+    _, page_height = A4
+
+    # One text object (single BT/ET block) for all lines
+    text = c.beginText()
+    text.setFont("Helvetica-Bold", 16)
+    text.setTextOrigin(50, page_height - 50)
+    text.textOut("Jira Timesheet Export")
+
+    text.setFont("Helvetica", 12)
+    text.setTextOrigin(50, page_height - 80)
+    text.textOut("Period: 01/Jan/26 - 31/Jan/26")
+    text.setTextOrigin(50, page_height - 110)
+    text.textOut(f"Project: {settings.company_name} Navigation App")
+
+    text.setFont("Helvetica-Bold", 14)
+    text.setTextOrigin(50, page_height - 160)
+    text.textOut(f"Total: {_slot('HOURS')}")
+    c.drawText(text)
+
+    c.save()
+    return buffer.getvalue()
+
+
+@functools.cache
+def _invoice_template() -> bytes:
+    """Render the invoice PDF once, with slots for hours, rate and total."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4, pageCompression=0)
+    _, page_height = A4
+    text = c.beginText()
+    text.setFont("Helvetica-Bold", 20)
+    text.setTextOrigin(50, page_height - 50)
+    text.textOut("INVOICE")
+    text.setFont("Helvetica", 12)
+    text.setTextOrigin(50, page_height - 90)
+    text.textOut("Invoice #: 2026-001")
+    text.setTextOrigin(50, page_height - 150)
+    text.textOut(f"Hours: {_slot('HOURS')}")
+    text.setTextOrigin(50, page_height - 170)
+    text.textOut(f"Rate: {_slot('RATE')}")
+    text.setFont("Helvetica-Bold", 14)
+    text.setTextOrigin(50, page_height - 210)
+    text.textOut(f"Total: {_slot('TOTAL')}")
+    c.drawText(text)
+    c.save()
+    return buffer.getvalue()
+
+
+def create_timesheet(output_path: Path | str, total_hours: int = 160) -> Path:
+    """
+    Create a Jira-style test timesheet PDF.
+
+    Args:
+        output_path: Path for the output PDF file.
+        total_hours: Total hours shown on the timesheet.
+
+    Returns:
+        Path to the created PDF file.
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_bytes(
+        _fill_template(_timesheet_template(), {"HOURS": f"{total_hours}h"})
+    )
+    logger.debug("Created test timesheet: %s", output_path)
+    return output_path
+
+
+def create_invoice_pdf(output_path: Path | str, hours: int, rate: int) -> Path:
+    """
+    Create a test invoice PDF.
+
+    Args:
+        output_path: Path for the output PDF file.
+        hours: Invoiced hours.
+        rate: Hourly rate in EUR.
+
+    Returns:
+        Path to the created PDF file.
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_bytes(
+        _fill_template(
+            _invoice_template(),
+            {
+                "HOURS": str(hours),
+                "RATE": f"{rate} EUR/h",
+                "TOTAL": f"{hours * rate} EUR",
+            },
+        )
+    )
+    logger.debug("Created test invoice: %s", output_path)
+    return output_path
@@ -1,11 +1,19 @@
 """Telegram bot for invoice automation notifications and approvals."""
 
 import asyncio
+import base64
+import functools
+import io
 import logging
 from dataclasses import dataclass
+from email import policy
+from email.message import EmailMessage
 from enum import Enum
+from pathlib import Path
 from typing import Any, Callable, Coroutine
 
+import orjson
+from googleapiclient.http import MediaIoBaseUpload
 from telegram import (
     InlineKeyboardButton,
     InlineKeyboardMarkup,
@@ -24,10 +32,28 @@ from telegram.ext import (
 )
 
 from src.config import settings
+from src.gmail.auth import get_gmail_service
 from src.models import TimesheetInfo
+from src.pdf.templates import create_invoice_pdf, create_timesheet
 
 logger = logging.getLogger(__name__)
 
+# Settings read by the debug send handlers, bound once at import
+_FROM_EMAIL = settings.from_email
+_HOURLY_RATE = settings.hourly_rate
+
+# Timesheet approval message; the currency is filled in once at import
+_TS_TEMPLATE = (
+    "*New Timesheet Detected*\n\n"
+    "*Period:* {date_range}\n"
+    "*Total Hours:* {total_hours}h\n\n"
+    "*Invoice Breakdown:*\n"
+    "  - Software architecture: {arch_hours}h\n"
+    "  - Testing: {test_hours}h\n\n"
+    "*Total Amount:* {amount:.2f} " + settings.currency.replace("{", "{{").replace("}", "}}") + "\n\n"
+    "Please approve to send emails to manager and accountant."
+)
+
 
 class ApprovalAction(str, Enum):
     """Actions that can result from approval interactions."""
@@ -69,6 +95,59 @@ DEBUG_KEYBOARD = ReplyKeyboardMarkup(
     is_persistent=True,
 )
 
+# Inline keyboards are immutable, so each is built once and reused
+TIMESHEET_APPROVAL_MARKUP = InlineKeyboardMarkup(
+    [
+        [
+            InlineKeyboardButton("Approve", callback_data=CallbackData.TIMESHEET_APPROVE.value),
+            InlineKeyboardButton("Edit Hours", callback_data=CallbackData.TIMESHEET_EDIT.value),
+            InlineKeyboardButton("Cancel", callback_data=CallbackData.TIMESHEET_CANCEL.value),
+        ]
+    ]
+)
+DOCS_APPROVAL_MARKUP = InlineKeyboardMarkup(
+    [
+        [
+            InlineKeyboardButton("Approve", callback_data=CallbackData.DOCS_APPROVE.value),
+            InlineKeyboardButton("Cancel", callback_data=CallbackData.DOCS_CANCEL.value),
+        ]
+    ]
+)
+
+
+# Last parsed state file, keyed by (mtime_ns, size); callers only read it
+_state_cache: tuple[tuple[int, int], dict[str, Any]] | None = None
+
+
+def _read_state() -> dict[str, Any] | None:
+    """Read the persisted workflow state, or None if there is none yet.
+
+    Re-parsed only when the file's mtime or size changed. Blocking; the
+    debug handlers call it via asyncio.to_thread.
+    """
+    global _state_cache
+
+    # Local: src.workflow imports this module
+    from src.workflow import STATE_FILE
+
+    try:
+        stat = STATE_FILE.stat()
+        key = (stat.st_mtime_ns, stat.st_size)
+        if _state_cache is not None and _state_cache[0] == key:
+            return _state_cache[1]
+        state = orjson.loads(STATE_FILE.read_bytes())
+    except FileNotFoundError:
+        return None
+
+    _state_cache = (key, state)
+    return state
+
+
+@functools.lru_cache(maxsize=16)
+def _retry_markup(callback: str) -> InlineKeyboardMarkup:
+    """Single "Retry" button keyboard for an error's retry callback."""
+    return InlineKeyboardMarkup([[InlineKeyboardButton("Retry", callback_data=callback)]])
+
 
 @dataclass
 class ApprovalResult:
@@ -97,6 +176,24 @@ class TelegramBot:
         self._original_timesheet_info: TimesheetInfo | None = None
         self._original_total_amount: float | None = None
 
+        # Inline button handlers by callback data (ERROR_RETRY is handled
+        # separately, it takes no message ID)
+        self._callback_dispatch: dict[str, Callable[[int], Coroutine[Any, Any, None]]] = {
+            CallbackData.TIMESHEET_APPROVE.value: self._handle_timesheet_approve,
+            CallbackData.TIMESHEET_EDIT.value: self._handle_timesheet_edit,
+            CallbackData.TIMESHEET_CANCEL.value: self._handle_timesheet_cancel,
+            CallbackData.DOCS_APPROVE.value: self._handle_docs_approve,
+            CallbackData.DOCS_CANCEL.value: self._handle_docs_cancel,
+        }
+        # Debug keyboard handlers by button label
+        self._debug_dispatch: dict[str, Callable[[], Coroutine[Any, Any, None]]] = {
+            DebugButton.STATUS.value: self._handle_debug_status,
+            DebugButton.DROP_PDF.value: self._handle_debug_drop_pdf,
+            DebugButton.SEND_APPROVAL.value: self._handle_debug_send_approval,
+            DebugButton.SEND_INVOICE.value: self._handle_debug_send_invoice,
+            DebugButton.RESET.value: self._handle_debug_reset,
+        }
+
     async def initialize(self) -> None:
         """Initialize and start the bot application."""
         self._app = (
@@ -215,14 +312,20 @@ class TelegramBot:
         Returns:
             Message ID of the sent message
         """
-        if not self._app:
-            raise RuntimeError("Bot not initialized. Call initialize() first.")
-
         keyboard = [
             [InlineKeyboardButton(label, callback_data=data) for label, data in row]
             for row in buttons
         ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        return await self._send_with_markup(text, InlineKeyboardMarkup(keyboard))
+
+    async def _send_with_markup(self, text: str, reply_markup: InlineKeyboardMarkup) -> int:
+        """Send a message with a prebuilt inline keyboard.
+
+        Returns:
+            Message ID of the sent message
+        """
+        if not self._app:
+            raise RuntimeError("Bot not initialized. Call initialize() first.")
 
         message = await self._app.bot.send_message(
             chat_id=self._chat_id,
@@ -285,15 +388,7 @@ class TelegramBot:
         self._original_total_amount = total_amount
 
         text = self._format_timesheet_message(timesheet_info, total_amount)
-        buttons = [
-            [
-                ("Approve", CallbackData.TIMESHEET_APPROVE.value),
-                ("Edit Hours", CallbackData.TIMESHEET_EDIT.value),
-                ("Cancel", CallbackData.TIMESHEET_CANCEL.value),
-            ]
-        ]
-
-        return await self.send_message_with_buttons(text, buttons)
+        return await self._send_with_markup(text, TIMESHEET_APPROVAL_MARKUP)
 
     async def send_docs_ready_approval(self, details: str) -> int:
         """Send notification that all documents are ready for final approval.
@@ -309,14 +404,7 @@ class TelegramBot:
             f"{details}\n\n"
             "Ready to merge and send final invoice?"
         )
-        buttons = [
-            [
-                ("Approve", CallbackData.DOCS_APPROVE.value),
-                ("Cancel", CallbackData.DOCS_CANCEL.value),
-            ]
-        ]
-
-        return await self.send_message_with_buttons(text, buttons)
+        return await self._send_with_markup(text, DOCS_APPROVAL_MARKUP)
 
     async def send_error(
         self,
@@ -339,8 +427,7 @@ class TelegramBot:
             text += f"\n\n_Context:_ {context}"
 
         if retry_callback:
-            buttons = [[("Retry", retry_callback)]]
-            return await self.send_message_with_buttons(text, buttons)
+            return await self._send_with_markup(text, _retry_markup(retry_callback))
         else:
             return await self.send_message(text)
 
@@ -358,15 +445,12 @@ class TelegramBot:
         Returns:
             Formatted message text
         """
-        return (
-            f"*New Timesheet Detected*\n\n"
-            f"*Period:* {timesheet_info.date_range}\n"
-            f"*Total Hours:* {timesheet_info.total_hours}h\n\n"
-            f"*Invoice Breakdown:*\n"
-            f"  - Software architecture: {timesheet_info.arch_hours}h\n"
-            f"  - Testing: {timesheet_info.test_hours}h\n\n"
-            f"*Total Amount:* {total_amount:.2f} {settings.currency}\n\n"
-            f"Please approve to send emails to manager and accountant."
+        return _TS_TEMPLATE.format(
+            date_range=timesheet_info.date_range,
+            total_hours=timesheet_info.total_hours,
+            arch_hours=timesheet_info.arch_hours,
+            test_hours=timesheet_info.test_hours,
+            amount=total_amount,
         )
 
     async def _handle_callback(
@@ -396,16 +480,9 @@ class TelegramBot:
 
         callback_data = query.data
 
-        if callback_data == CallbackData.TIMESHEET_APPROVE.value:
-            await self._handle_timesheet_approve(query.message.message_id)
-        elif callback_data == CallbackData.TIMESHEET_EDIT.value:
-            await self._handle_timesheet_edit(query.message.message_id)
-        elif callback_data == CallbackData.TIMESHEET_CANCEL.value:
-            await self._handle_timesheet_cancel(query.message.message_id)
-        elif callback_data == CallbackData.DOCS_APPROVE.value:
-            await self._handle_docs_approve(query.message.message_id)
-        elif callback_data == CallbackData.DOCS_CANCEL.value:
-            await self._handle_docs_cancel(query.message.message_id)
+        handler = self._callback_dispatch.get(callback_data)
+        if handler is not None:
+            await handler(query.message.message_id)
         elif callback_data == CallbackData.ERROR_RETRY.value:
             # Error retry is handled by external callback
             if self._callback_handler:
@@ -490,20 +567,9 @@ class TelegramBot:
         text = update.message.text.strip()
 
         # Debug buttons (check before edit mode)
-        if text == DebugButton.STATUS.value:
-            await self._handle_debug_status()
-            return
-        elif text == DebugButton.DROP_PDF.value:
-            await self._handle_debug_drop_pdf()
-            return
-        elif text == DebugButton.SEND_APPROVAL.value:
-            await self._handle_debug_send_approval()
-            return
-        elif text == DebugButton.SEND_INVOICE.value:
-            await self._handle_debug_send_invoice()
-            return
-        elif text == DebugButton.RESET.value:
-            await self._handle_debug_reset()
+        debug_handler = self._debug_dispatch.get(text)
+        if debug_handler is not None:
+            await debug_handler()
             return
 
         # Only process further if in edit mode
@@ -544,30 +610,12 @@ class TelegramBot:
             text += "\n\n_Hours updated from "
             text += f"{self._original_timesheet_info.total_hours} to {hours}_"
 
-            keyboard = [
-                [
-                    InlineKeyboardButton(
-                        "Approve",
-                        callback_data=CallbackData.TIMESHEET_APPROVE.value,
-                    ),
-                    InlineKeyboardButton(
-                        "Edit Hours",
-                        callback_data=CallbackData.TIMESHEET_EDIT.value,
-                    ),
-                    InlineKeyboardButton(
-                        "Cancel",
-                        callback_data=CallbackData.TIMESHEET_CANCEL.value,
-                    ),
-                ]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
-
             await self._app.bot.edit_message_text(
                 chat_id=self._chat_id,
                 message_id=self._pending_edit_message_id,
                 text=text,
                 parse_mode="Markdown",
-                reply_markup=reply_markup,
+                reply_markup=TIMESHEET_APPROVAL_MARKUP,
             )
 
             # Update stored info for potential further edits
@@ -596,34 +644,14 @@ class TelegramBot:
                     )
                     text += "\n\n_Edit timed out. Original values restored._"
 
-                    keyboard = [
-                        [
-                            InlineKeyboardButton(
-                                "Approve",
-                                callback_data=CallbackData.TIMESHEET_APPROVE.value,
-                            ),
-                            InlineKeyboardButton(
-                                "Edit Hours",
-                                callback_data=CallbackData.TIMESHEET_EDIT.value,
-                            ),
-                            InlineKeyboardButton(
-                                "Cancel",
-                                callback_data=CallbackData.TIMESHEET_CANCEL.value,
-                            ),
-                        ]
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-
                     await self._app.bot.edit_message_text(
                         chat_id=self._chat_id,
                         message_id=self._pending_edit_message_id,
                         text=text,
                         parse_mode="Markdown",
-                        reply_markup=reply_markup,
+                        reply_markup=TIMESHEET_APPROVAL_MARKUP,
                     )
 
-                    await self.send_message("_Edit mode timed out._")
-
         except asyncio.CancelledError:
             pass  # Normal cancellation when edit completes
 
@@ -631,20 +659,49 @@ class TelegramBot:
     # Debug Handlers
     # =========================================================================
 
+    async def _get_first_msg_headers(
+        self,
+        thread_id: str,
+        cached: dict[str, str] | None,
+    ) -> dict[str, str] | None:
+        """Get Subject and Message-ID of the first message in a thread.
+
+        Uses the headers cached in state when the thread was created and
+        only falls back to a metadata fetch for older state files.
+        Gmail services are cached per thread (httplib2 is not thread-safe),
+        so the service is fetched in the same worker thread that uses it.
+
+        Returns:
+            Header dict, or None if the thread has no messages
+        """
+        if cached:
+            return cached
+
+        thread = await asyncio.to_thread(
+            lambda: get_gmail_service().users().threads().get(
+                userId="me",
+                id=thread_id,
+                format="metadata",
+                metadataHeaders=["Subject", "Message-ID"],
+                fields="messages/payload/headers",
+            ).execute()
+        )
+        messages = thread.get("messages", [])
+        if not messages:
+            return None
+
+        return {h["name"]: h["value"] for h in messages[0]["payload"]["headers"]}
+
     async def _handle_debug_status(self) -> None:
         """Show current workflow status."""
-        import json
-        from src.workflow import STATE_FILE
-
         logger.debug("Debug: status requested")
 
         try:
-            if not STATE_FILE.exists():
+            state = await asyncio.to_thread(_read_state)
+            if state is None:
                 await self.send_message("*Status:* IDLE (no state file)")
                 return
 
-            state = json.loads(STATE_FILE.read_text())
-
             status_lines = [
                 f"*Status:* {state.get('state', 'unknown')}",
                 "",
@@ -675,32 +732,16 @@ class TelegramBot:
 
     async def _handle_debug_drop_pdf(self) -> None:
         """Create and drop a test timesheet PDF (160h default)."""
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
-
         logger.debug("Debug: drop PDF requested")
 
         total_hours = 160  # Fixed default for debug
 
         try:
             output_path = settings.watch_folder / "timesheet_test.pdf"
-            settings.watch_folder.mkdir(parents=True, exist_ok=True)
-
-            # Create test PDF
-            c = canvas.Canvas(str(output_path), pagesize=A4)
-            width, height = A4
-
-            c.setFont("Helvetica-Bold", 16)
-            c.drawString(50, height - 50, "Jira Timesheet Export")
-
-            c.setFont("Helvetica", 12)
-            c.drawString(50, height - 80, "Period: 01/Jan/26 - 31/Jan/26")
-            c.drawString(50, height - 110, f"Project: {settings.company_name} Navigation App")
 
-            c.setFont("Helvetica-Bold", 14)
-            c.drawString(50, height - 160, f"Total: {total_hours}h")
-
-            c.save()
+            # Create test PDF and the watch folder (ReportLab is imported on
+            # first use; keep it off the loop)
+            await asyncio.to_thread(create_timesheet, output_path, total_hours)
 
             await self.send_message(
                 f"📄 Test PDF created: `{output_path.name}`\n\n"
@@ -714,22 +755,15 @@ class TelegramBot:
 
     async def _handle_debug_send_approval(self) -> None:
         """Send approval email to manager thread (for testing)."""
-        import base64
-        import json
-        from email.mime.text import MIMEText
-        from src.workflow import STATE_FILE
-        from src.gmail.auth import get_gmail_service
-
         logger.debug("Debug: send approval requested")
 
         try:
             # Validate state
-            if not STATE_FILE.exists():
+            state = await asyncio.to_thread(_read_state)
+            if state is None:
                 await self.send_message("*Error:* No state file. Start workflow first.")
                 return
 
-            state = json.loads(STATE_FILE.read_text())
-
             if state.get("state") != "WAITING_DOCS":
                 await self.send_message(
                     f"*Error:* Not in WAITING_DOCS state (current: {state.get('state')})"
@@ -747,34 +781,30 @@ class TelegramBot:
 
             await self.send_message("📧 Sending approval reply...")
 
-            # Get Gmail service (sync call, wrap in thread)
-            service = await asyncio.to_thread(get_gmail_service)
-
-            # Get original message to reply to
-            thread = await asyncio.to_thread(
-                lambda: service.users().threads().get(userId="me", id=thread_id).execute()
+            # Get original message headers to reply to
+            headers = await self._get_first_msg_headers(
+                thread_id, state.get("manager_first_msg_headers")
             )
-            messages = thread.get("messages", [])
-            if not messages:
+            if headers is None:
                 await self.send_message("*Error:* No messages in thread.")
                 return
 
-            original_msg = messages[0]
-            headers = {h["name"]: h["value"] for h in original_msg["payload"]["headers"]}
             subject = headers.get("Subject", "")
             message_id = headers.get("Message-ID", "")
 
             # Create reply (self-test: from and to are same account)
-            reply = MIMEText("ok schvalujem\n\nS pozdravom,\nManager")
-            reply["To"] = settings.from_email
-            reply["From"] = settings.from_email
+            reply = EmailMessage()
+            reply["To"] = _FROM_EMAIL
+            reply["From"] = _FROM_EMAIL
             reply["Subject"] = f"Re: {subject}" if not subject.startswith("Re:") else subject
             reply["In-Reply-To"] = message_id
             reply["References"] = message_id
+            reply.set_content("ok schvalujem\n\nS pozdravom,\nManager")
 
-            raw = base64.urlsafe_b64encode(reply.as_bytes()).decode()
+            raw = base64.urlsafe_b64encode(reply.as_bytes(policy=policy.SMTP)).decode()
+            # Service fetched in the worker thread that uses it (per-thread cache)
             await asyncio.to_thread(
-                lambda: service.users().messages().send(
+                lambda: get_gmail_service().users().messages().send(
                     userId="me",
                     body={"raw": raw, "threadId": thread_id}
                 ).execute()
@@ -791,27 +821,15 @@ class TelegramBot:
 
     async def _handle_debug_send_invoice(self) -> None:
         """Send invoice email with PDF attachment (for testing)."""
-        import base64
-        import json
-        from email.mime.application import MIMEApplication
-        from email.mime.multipart import MIMEMultipart
-        from email.mime.text import MIMEText
-        from pathlib import Path
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
-        from src.workflow import STATE_FILE
-        from src.gmail.auth import get_gmail_service
-
         logger.debug("Debug: send invoice requested")
 
         try:
             # Validate state
-            if not STATE_FILE.exists():
+            state = await asyncio.to_thread(_read_state)
+            if state is None:
                 await self.send_message("*Error:* No state file. Start workflow first.")
                 return
 
-            state = json.loads(STATE_FILE.read_text())
-
             if state.get("state") != "WAITING_DOCS":
                 await self.send_message(
                     f"*Error:* Not in WAITING_DOCS state (current: {state.get('state')})"
@@ -829,66 +847,49 @@ class TelegramBot:
 
             await self.send_message("📧 Creating and sending invoice...")
 
-            # Create invoice PDF
+            # Create invoice PDF (ReportLab is imported on first use; keep it off the loop)
             timesheet_info = state.get("timesheet_info", {})
             hours = timesheet_info.get("total_hours", 160)
-            rate = settings.hourly_rate
-            total = hours * rate
-
-            invoice_path = Path("data/temp/test_invoice.pdf")
-            invoice_path.parent.mkdir(parents=True, exist_ok=True)
-
-            c = canvas.Canvas(str(invoice_path), pagesize=A4)
-            width, height = A4
-            c.setFont("Helvetica-Bold", 20)
-            c.drawString(50, height - 50, "INVOICE")
-            c.setFont("Helvetica", 12)
-            c.drawString(50, height - 90, "Invoice #: 2026-001")
-            c.drawString(50, height - 150, f"Hours: {hours}")
-            c.drawString(50, height - 170, f"Rate: {rate} EUR/h")
-            c.setFont("Helvetica-Bold", 14)
-            c.drawString(50, height - 210, f"Total: {total} EUR")
-            c.save()
-
-            # Get Gmail service
-            service = await asyncio.to_thread(get_gmail_service)
-
-            # Get original message
-            thread = await asyncio.to_thread(
-                lambda: service.users().threads().get(userId="me", id=thread_id).execute()
+            invoice_path = await asyncio.to_thread(
+                create_invoice_pdf, Path("data/temp/test_invoice.pdf"), hours, _HOURLY_RATE
+            )
+
+            # Get original message headers
+            headers = await self._get_first_msg_headers(
+                thread_id, state.get("accountant_first_msg_headers")
             )
-            messages = thread.get("messages", [])
-            if not messages:
+            if headers is None:
                 await self.send_message("*Error:* No messages in thread.")
                 return
 
-            original_msg = messages[0]
-            headers = {h["name"]: h["value"] for h in original_msg["payload"]["headers"]}
             subject = headers.get("Subject", "")
             message_id = headers.get("Message-ID", "")
 
             # Create reply with attachment
-            msg = MIMEMultipart()
-            msg["To"] = settings.from_email
-            msg["From"] = settings.from_email
+            msg = EmailMessage()
+            msg["To"] = _FROM_EMAIL
+            msg["From"] = _FROM_EMAIL
             msg["Subject"] = f"Re: {subject}" if not subject.startswith("Re:") else subject
             msg["In-Reply-To"] = message_id
             msg["References"] = message_id
 
-            msg.attach(MIMEText("V prilohe faktura.\n\nS pozdravom,\nAccountant"))
-
-            with open(invoice_path, "rb") as f:
-                attachment = MIMEApplication(f.read(), _subtype="pdf")
-                attachment.add_header(
-                    "Content-Disposition", "attachment", filename="faktura_2026_01.pdf"
-                )
-                msg.attach(attachment)
+            msg.set_content("V prilohe faktura.\n\nS pozdravom,\nAccountant")
+            msg.add_attachment(
+                invoice_path.read_bytes(),
+                maintype="application",
+                subtype="pdf",
+                filename="faktura_2026_01.pdf",
+            )
 
-            raw = base64.urlsafe_b64encode(msg.as_bytes()).decode()
+            # Upload the MIME message as a media body instead of wrapping
+            # the whole message (PDF included) in another base64 "raw" layer
+            media = MediaIoBaseUpload(io.BytesIO(msg.as_bytes(policy=policy.SMTP)), mimetype="message/rfc822")
+            # Service fetched in the worker thread that uses it (per-thread cache)
             await asyncio.to_thread(
-                lambda: service.users().messages().send(
+                lambda: get_gmail_service().users().messages().send(
                     userId="me",
-                    body={"raw": raw, "threadId": thread_id}
+                    body={"threadId": thread_id},
+                    media_body=media,
                 ).execute()
             )
 
@@ -8,6 +8,8 @@ from pathlib import Path
 from typing import Callable
 
 from watchdog.events import FileCreatedEvent, FileModifiedEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+from watchdog.observers.api import BaseObserver
 from watchdog.observers.polling import PollingObserver
 
 from src.config import settings
@@ -130,6 +132,7 @@ class FolderWatcher:
         self,
         watch_folder: Path | None = None,
         debounce_seconds: float = 2.0,
+        use_polling: bool | None = None,
     ) -> None:
         """Initialize the folder watcher.
 
@@ -137,10 +140,13 @@ class FolderWatcher:
             watch_folder: Folder to watch. Defaults to settings.watch_folder.
             debounce_seconds: Time to wait after last modification before
                              considering a file ready.
+            use_polling: Poll the folder instead of using native filesystem
+                events. Defaults to settings.watch_folder_polling.
         """
         self._watch_folder = watch_folder or settings.watch_folder
         self._debounce_seconds = debounce_seconds
-        self._observer: PollingObserver | None = None
+        self._use_polling = settings.watch_folder_polling if use_polling is None else use_polling
+        self._observer: BaseObserver | None = None
         self._handler: _DebouncedPDFHandler | None = None
         self._queue: asyncio.Queue[FileEvent] = asyncio.Queue()
         self._loop: asyncio.AbstractEventLoop | None = None
@@ -180,8 +186,9 @@ class FolderWatcher:
             callback=self._on_file_ready,
             debounce_seconds=self._debounce_seconds,
         )
-        # Use PollingObserver for Docker/Windows compatibility (inotify doesn't work through bind mounts)
-        self._observer = PollingObserver(timeout=2.0)
+        # PollingObserver for Docker/Windows compatibility (inotify doesn't work
+        # through bind mounts); otherwise native events with no idle wakeups
+        self._observer = PollingObserver(timeout=2.0) if self._use_polling else Observer()
         self._observer.schedule(
             self._handler,
             str(self._watch_folder),
@@ -189,7 +196,9 @@ class FolderWatcher:
         )
         self._observer.start()
         self._running = True
-        logger.info("Folder watcher started")
+        logger.info(
+            "Folder watcher started (%s)", "polling" if self._use_polling else "native events"
+        )
 
         # Scan for existing PDF files on startup
         await self._scan_existing_files()
@@ -1,24 +1,39 @@
 """Workflow coordinator - state machine for invoice automation."""
 
 import asyncio
-import json
 import logging
 import shutil
 from datetime import datetime
 from pathlib import Path
 from typing import Callable, Awaitable
 
+import orjson
+
 from src.config import settings
-from src.models import WorkflowState, WorkflowData, TimesheetInfo, EmailInfo
+from src.models import (
+    WorkflowState,
+    WorkflowData,
+    TimesheetInfo,
+    EmailInfo,
+    WorkflowEvent,
+    NewTimesheetEvent,
+    ApprovalResultEvent,
+    EmailReceivedEvent,
+)
 from src.pdf import parse_timesheet, merge_pdfs, HtmlToPdfConverter, html_to_pdf
 from src.telegram.bot import TelegramBot, ApprovalAction, ApprovalResult
-from src.gmail import send_email, reply_to_thread, GmailMonitor
+from src.gmail.sender import send_email, reply_to_thread, new_message_id
+from src.gmail.monitor import GmailMonitor
 from src.llm.gemini import GeminiClient
 
 logger = logging.getLogger(__name__)
 
 STATE_FILE = Path("data/state.json")
 
+# Sender addresses for the FROM fallback, lowercased once
+_MANAGER_EMAIL = settings.manager_email.lower()
+_ACCOUNTANT_EMAIL = settings.accountant_email.lower()
+
 
 class WorkflowCoordinator:
     """Orchestrates the invoice automation workflow."""
@@ -40,26 +55,26 @@ class WorkflowCoordinator:
 
     def _load_state(self) -> None:
         """Load workflow state from disk."""
-        if STATE_FILE.exists():
-            try:
-                with open(STATE_FILE) as f:
-                    data = json.load(f)
-                self.data = WorkflowData.model_validate(data)
-                logger.info(f"Loaded state: {self.data.state}")
-            except Exception as e:
-                logger.warning(f"Failed to load state, starting fresh: {e}")
-                self.data = WorkflowData()
-        else:
+        try:
+            data = orjson.loads(STATE_FILE.read_bytes())
+            self.data = WorkflowData.from_dict(data)
+            logger.info(f"Loaded state: {self.data.state}")
+        except FileNotFoundError:
             logger.info("No state file, starting fresh")
+        except Exception as e:
+            logger.warning(f"Failed to load state, starting fresh: {e}")
+            self.data = WorkflowData()
 
     def _save_state(self) -> None:
         """Persist workflow state to disk."""
         STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(STATE_FILE, "w") as f:
-            json.dump(self.data.model_dump(mode="json"), f, indent=2, default=str)
+        # orjson serializes dataclasses, enums and datetimes natively; Paths via str
+        STATE_FILE.write_bytes(
+            orjson.dumps(self.data, default=str, option=orjson.OPT_INDENT_2)
+        )
         logger.debug(f"Saved state: {self.data.state}")
 
-    async def handle_event(self, event: dict) -> None:
+    async def handle_event(self, event: WorkflowEvent) -> None:
         """Queue an event for processing."""
         await self.event_queue.put(event)
 
@@ -128,19 +143,19 @@ class WorkflowCoordinator:
                 status.append("Waiting for invoice from accountant")
             await self.bot.send_message(f"Workflow resumed:\n- " + "\n- ".join(status))
 
-    async def _process_event(self, event: dict) -> None:
+    async def _process_event(self, event: WorkflowEvent) -> None:
         """Process a single event based on current state."""
-        event_type = event.get("type")
-        logger.info(f"Processing event: {event_type} in state: {self.data.state}")
-
-        if event_type == "new_timesheet":
-            await self._handle_new_timesheet(event["path"])
-        elif event_type == "approval_result":
-            await self._handle_approval_result(event["result"])
-        elif event_type == "email_received":
-            await self._handle_email_received(event["email"])
-        else:
-            logger.warning(f"Unknown event type: {event_type}")
+        logger.info(f"Processing event: {type(event).__name__} in state: {self.data.state}")
+
+        match event:
+            case NewTimesheetEvent(path=path):
+                await self._handle_new_timesheet(path)
+            case ApprovalResultEvent(result=result):
+                await self._handle_approval_result(result)
+            case EmailReceivedEvent(email=email):
+                await self._handle_email_received(email)
+            case _:
+                logger.warning(f"Unknown event type: {type(event).__name__}")
 
     async def _handle_new_timesheet(self, path: Path) -> None:
         """Handle a new timesheet PDF being detected."""
@@ -207,6 +222,7 @@ class WorkflowCoordinator:
             # Email to manager + invoicing
             subject = f"{settings.company_name} faktura {info.month:02d}/{info.year}"
             body = "Ahoj, v prilohe worklog na schvalenie"
+            header_id = new_message_id()
 
             msg_id, thread_id = await asyncio.to_thread(
                 send_email,
@@ -215,8 +231,10 @@ class WorkflowCoordinator:
                 body=body,
                 cc=settings.invoicing_dept_email,
                 attachment_path=self.data.timesheet_path,
+                message_id=header_id,
             )
             self.data.manager_thread_id = thread_id
+            self.data.manager_first_msg_headers = {"Subject": subject, "Message-ID": header_id}
             logger.info(f"Sent manager email, thread: {thread_id}")
 
             # Email to accountant
@@ -229,13 +247,17 @@ class WorkflowCoordinator:
                 f"testovanie navigačnej apl. počas jazdy - {info.test_hours}h"
             )
 
+            acc_header_id = new_message_id()
+
             msg_id, thread_id = await asyncio.to_thread(
                 send_email,
                 to=settings.accountant_email,
                 subject=acc_subject,
                 body=acc_body,
+                message_id=acc_header_id,
             )
             self.data.accountant_thread_id = thread_id
+            self.data.accountant_first_msg_headers = {"Subject": acc_subject, "Message-ID": acc_header_id}
             logger.info(f"Sent accountant email, thread: {thread_id}")
 
             # Transition to WAITING_DOCS
@@ -266,9 +288,9 @@ class WorkflowCoordinator:
         elif self.data.accountant_thread_id and email.thread_id == self.data.accountant_thread_id:
             await self._check_invoice_email(email)
         # Fallback: check FROM address
-        elif email.from_email.lower() == settings.manager_email.lower():
+        elif (from_email := email.from_email.lower()) == _MANAGER_EMAIL:
             await self._check_approval_email(email)
-        elif email.from_email.lower() == settings.accountant_email.lower():
+        elif from_email == _ACCOUNTANT_EMAIL:
             await self._check_invoice_email(email)
 
     def _format_email_as_html(self, email: EmailInfo) -> str:
@@ -315,10 +337,8 @@ class WorkflowCoordinator:
 
     async def _check_approval_email(self, email: EmailInfo) -> None:
         """Check if email is an approval."""
-        body = email.body_text.lower()
-
-        # Check keywords
-        is_approval = any(kw in body for kw in settings.approval_keywords_list)
+        # Check keywords (single regex pass over the body)
+        is_approval = bool(settings.approval_keywords_pattern.search(email.body_text))
 
         if not is_approval:
             # Fallback to LLM
@@ -0,0 +1,18 @@
+"""Shared pytest configuration.
+
+src.config builds its settings at import time and several of them are
+required, so placeholder values are set here before any test imports src.
+"""
+
+import os
+
+for _name, _value in {
+    "TELEGRAM_BOT_TOKEN": "test-token",
+    "TELEGRAM_CHAT_ID": "1",
+    "FROM_EMAIL": "me@example.com",
+    "MANAGER_EMAIL": "manager@example.com",
+    "INVOICING_DEPT_EMAIL": "invoicing@example.com",
+    "ACCOUNTANT_EMAIL": "accountant@example.com",
+    "GEMINI_API_KEY": "test-key",
+}.items():
+    os.environ.setdefault(_name, _value)
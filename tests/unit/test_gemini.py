@@ -0,0 +1,98 @@
+"""Tests for approval classification in src.llm.gemini."""
+
+import asyncio
+
+import pytest
+
+from src.llm.gemini import (
+    PREFILTER_CONFIDENCE,
+    BatchingGeminiClient,
+    GeminiClient,
+    ResponseCache,
+)
+
+
+class FakeSemanticCache:
+    """Semantic cache that reports every lookup as a near-duplicate approval."""
+
+    def __init__(self):
+        self.lookups = []
+        self.added = []
+
+    def lookup(self, text):
+        self.lookups.append(text)
+        return (True, 0.99)
+
+    def add(self, text, result):
+        self.added.append((text, result))
+
+
+@pytest.fixture
+def client(tmp_path):
+    client = GeminiClient(
+        cache=ResponseCache(tmp_path / "llm_cache.sqlite"),
+    )
+    client.prompts = []
+
+    async def generate_text(prompt):
+        client.prompts.append(prompt)
+        return '{"is_approval": false, "confidence": 0.9, "reason": "negated"}'
+
+    client.generate_text = generate_text
+    yield client
+    asyncio.run(client.close())
+
+
+def test_prefilter_approves_configured_keyword(client):
+    assert asyncio.run(client.is_approval_email("Schvalujem.")) == (True, PREFILTER_CONFIDENCE)
+    assert client.prompts == []
+
+
+def test_prefilter_rejects_without_llm(client):
+    assert asyncio.run(client.is_approval_email("Rejected.")) == (False, PREFILTER_CONFIDENCE)
+    assert client.prompts == []
+
+
+@pytest.mark.parametrize("body", ["Agreed.", "Not approved.", "Ok, but fix the hours?"])
+def test_unconfigured_or_vetoed_reply_goes_to_llm(client, body):
+    assert asyncio.run(client.is_approval_email(body)) == (False, 0.9)
+    assert len(client.prompts) == 1
+
+
+def test_semantic_cache_serves_near_duplicate(client):
+    client.semantic_cache = FakeSemanticCache()
+    assert asyncio.run(client.is_approval_email("All good, thanks.")) == (True, 0.99)
+    assert client.prompts == []
+
+
+@pytest.mark.parametrize("body", ["not approved", "Neschvalujem, prosim uprav hodiny."])
+def test_negated_near_duplicate_misses_semantic_cache(client, body):
+    client.semantic_cache = FakeSemanticCache()
+    assert asyncio.run(client.is_approval_email(body)) == (False, 0.9)
+    assert client.semantic_cache.lookups == []
+    assert client.semantic_cache.added == []
+    assert len(client.prompts) == 1
+
+
+def test_close_resolves_queued_and_in_flight_requests(tmp_path):
+    async def scenario():
+        client = BatchingGeminiClient(
+            cache=ResponseCache(tmp_path / "llm_cache.sqlite"), max_batch=1
+        )
+        started = asyncio.Event()
+
+        async def generate_text(prompt):
+            started.set()
+            await asyncio.Event().wait()  # never answers
+
+        client.generate_text = generate_text
+        in_flight = asyncio.create_task(client.is_approval_email("Please review the first one."))
+        await started.wait()
+        queued = asyncio.create_task(client.is_approval_email("Please review the second one."))
+        while client._queue.empty():
+            await asyncio.sleep(0)
+
+        await client.close()
+        return await asyncio.wait_for(asyncio.gather(in_flight, queued), timeout=1)
+
+    assert asyncio.run(scenario()) == [(False, 0.0), (False, 0.0)]
@@ -0,0 +1,28 @@
+"""Tests for total hours extraction in src.pdf.parser."""
+
+from src.pdf.parser import _extract_total_hours, _has_summary
+
+
+def test_task_line_does_not_hide_total():
+    # "8h\nTotal" must not be read as "8h total", hiding "Total: 160h"
+    text = (
+        "Jira Timesheet Export\n"
+        "Period: 01/Jan/26 - 31/Jan/26\n"
+        "PROJ-1 Implement feature 8h\n"
+        "Total: 160h\n"
+    )
+    assert _extract_total_hours(text) == 160
+    assert _has_summary(text)
+
+
+def test_higher_priority_pattern_found_later_wins():
+    text = "Sum: 24h\nPROJ-2 Review 16h\nTotal: 168h\n"
+    assert _extract_total_hours(text) == 168
+
+
+def test_out_of_range_first_total_is_skipped():
+    assert _extract_total_hours("Total: 0h\nTotal Hours: 160") == 160
+
+
+def test_hours_before_total_on_one_line():
+    assert _extract_total_hours("Worked 120h total this month") == 120